@@ -3,6 +3,3 @@ from django.apps import AppConfig
 class AdminpanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adminpanel'
-
-    def ready(self):
-        import adminpanel.signals
\ No newline at end of file
@@ -6,8 +6,6 @@ from django.utils import timezone
 from django.contrib import messages
 from django.core.paginator import Paginator
 from utils.pagination import paginate_queryset
-from django.core.mail import send_mail
-from django.conf import settings
 from accounts.models import CustomUser
 from .models import (
     UserDocument, LandRecord, StorageSlot, CultivationSlot, SubsidyScheme
@@ -42,10 +40,10 @@ from utils.pagination import paginate_queryset  # your global pagination functio
 @login_required
 @admin_required
 def user_management(request):
-    users_qs = CustomUser.objects.filter(role__in=['farmer', 'buyer']).order_by('-date_joined')
+    users_qs = CustomUser.objects.filter(role__in=['farmer', 'buyer']).order_by('-date_joined', 'id')
     
     # Use global pagination function
-    page_obj, users = paginate_queryset(request, users_qs)
+    page_obj, users = paginate_queryset(request, users_qs, mode='keyset')
     
     return render(request, 'adminpanel/user_management.html', {
         'users': users,
@@ -59,14 +57,8 @@ def user_management(request):
 def approve_user(request, user_id):
     user = get_object_or_404(CustomUser, id=user_id)
     user.is_approved = True
-    user.save()
-    send_mail(
-        'Account Approved',
-        'Your AgriLeader account has been approved.',
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=True,
-    )
+    # notifications.signals sends the notification and email if this changes anything
+    user.save(update_fields=['is_approved'])
     messages.success(request, f'User {user.username} approved.')
     return redirect('adminpanel:user_management')
 
@@ -75,14 +67,7 @@ def approve_user(request, user_id):
 def reject_user(request, user_id):
     user = get_object_or_404(CustomUser, id=user_id)
     user.is_approved = False
-    user.save()
-    send_mail(
-        'Account Rejected',
-        'Your AgriLeader account has been rejected. Please contact support.',
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=True,
-    )
+    user.save(update_fields=['is_approved'])
     messages.error(request, f'User {user.username} rejected.')
     return redirect('adminpanel:user_management')
 
@@ -91,10 +76,10 @@ from utils.pagination import paginate_queryset  # adjust import path as needed
 @login_required
 @admin_required
 def document_verification(request):
-    docs_queryset = UserDocument.objects.filter(status='pending').order_by('-uploaded_at')
+    docs_queryset = UserDocument.objects.filter(status='pending').order_by('-uploaded_at', 'id')
     
     # Use global pagination
-    page_obj, docs_paginated = paginate_queryset(request, docs_queryset)
+    page_obj, docs_paginated = paginate_queryset(request, docs_queryset, mode='keyset')
     
     if request.method == 'POST':
         doc_id = request.POST.get('doc_id')
@@ -117,8 +102,8 @@ def document_verification(request):
 @login_required
 @admin_required
 def land_records(request):
-    records = LandRecord.objects.all().order_by('-created_at')
-    page_obj, records_paginated = paginate_queryset(request, records)
+    records = LandRecord.objects.all().order_by('-created_at', 'id')
+    page_obj, records_paginated = paginate_queryset(request, records, mode='keyset')
     
     context = {
         'records': records_paginated,  # only current page objects
@@ -332,8 +317,8 @@ def marketplace_monitoring(request):
         )
     ).order_by('-created_at')
 
-    # Use the global pagination function
-    page_obj, listings = paginate_queryset(request, listings)
+    # Use the global pagination function; the listings table can get large
+    page_obj, listings = paginate_queryset(request, listings, count='estimate')
     
     return render(request, 'adminpanel/marketplace_monitoring.html', {
         'listings': listings,
@@ -393,8 +378,8 @@ def reject_storage_booking(request, booking_id):
 @login_required
 @admin_required
 def cultivation_bookings(request):
-    bookings = CultivationBooking.objects.all().order_by('-booked_at')
-    page_obj, bookings_paginated = paginate_queryset(request, bookings)
+    bookings = CultivationBooking.objects.all().order_by('-booked_at', 'id')
+    page_obj, bookings_paginated = paginate_queryset(request, bookings, mode='keyset')
 
     context = {
         'bookings': bookings_paginated,  # only current page objects
@@ -408,8 +393,8 @@ def cultivation_bookings(request):
 @login_required
 @admin_required
 def storage_bookings(request):
-    bookings_qs = StorageBooking.objects.all().order_by('-booked_at')
-    page_obj, bookings = paginate_queryset(request, bookings_qs)
+    bookings_qs = StorageBooking.objects.all().order_by('-booked_at', 'id')
+    page_obj, bookings = paginate_queryset(request, bookings_qs, mode='keyset')
     
     return render(
         request, 
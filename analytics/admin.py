@@ -1,8 +1,13 @@
 from django.contrib import admin
-from .models import AnalyticsData
+from .models import AnalyticsData, DailyRollup
 
 @admin.register(AnalyticsData)
 class AnalyticsDataAdmin(admin.ModelAdmin):
     list_display = ('date', 'total_users', 'total_revenue', 'total_bookings', 'total_listings')
     list_filter = ('date',)
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'new_users', 'new_listings', 'total_bookings', 'total_revenue')
+    date_hierarchy = 'date'
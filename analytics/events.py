@@ -0,0 +1,185 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .pipeline import apply_analytics_delta, apply_sales_delta
+
+logger = logging.getLogger(__name__)
+
+# Set ANALYTICS_QUEUE_ENABLED = False (e.g. in tests) to apply deltas synchronously on commit
+QUEUE_ENABLED = getattr(settings, 'ANALYTICS_QUEUE_ENABLED', True)
+QUEUE_MAXSIZE = getattr(settings, 'ANALYTICS_QUEUE_MAXSIZE', 10_000)
+# The worker flushes whichever comes first: this many seconds or this many events
+FLUSH_INTERVAL = getattr(settings, 'ANALYTICS_FLUSH_INTERVAL', 5)
+FLUSH_EVENTS = getattr(settings, 'ANALYTICS_FLUSH_EVENTS', 500)
+
+_STOP = object()
+
+
+def record_analytics_delta(**deltas):
+    """
+    Queue an analytics delta once the current transaction commits. Rolled-back
+    changes never reach AnalyticsData, and the request never waits on the UPDATE.
+    """
+    _record(None, deltas)
+
+
+def record_sales_delta(farmer_id, crop_type, location, **deltas):
+    """Queue a delta for one farmer's SalesAggregate row, like record_analytics_delta"""
+    _record((farmer_id, crop_type, location), deltas)
+
+
+def _record(target, deltas):
+    deltas = {field: value for field, value in deltas.items() if value}
+    if deltas:
+        transaction.on_commit(lambda: event_queue.put((target, deltas)))
+
+
+class AnalyticsEventQueue:
+    """
+    Bounded in-process queue drained by one daemon thread, which sums the
+    queued deltas per target row and writes each row with a single UPDATE.
+    Items are (target, deltas): target None is today's AnalyticsData row,
+    otherwise a (farmer_id, crop_type, location) SalesAggregate key.
+    """
+
+    def __init__(self, maxsize=QUEUE_MAXSIZE, flush_interval=FLUSH_INTERVAL,
+                 flush_events=FLUSH_EVENTS, enabled=QUEUE_ENABLED):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.flush_events = flush_events
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stats = {
+            'enqueued': 0,
+            'flushed_events': 0,
+            'flushes': 0,
+            'sync_fallbacks': 0,
+            'failed_flushes': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+        }
+
+    def put(self, item):
+        if not self.enabled:
+            _apply(*item)
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Back-pressure: never drop an event, pay for it on this request instead
+            with self._lock:
+                self._stats['sync_fallbacks'] += 1
+            _apply(*item)
+            return
+        with self._lock:
+            self._stats['enqueued'] += 1
+
+    def metrics(self):
+        """Queue depth and flush counters/latency, for logging or a health view"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['worker_alive'] = bool(self._worker and self._worker.is_alive())
+        return stats
+
+    def drain(self):
+        """Flush everything still queued on the calling thread"""
+        pending, count = {}, 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                _merge(pending, item)
+                count += 1
+        self._flush(pending, count)
+
+    def stop(self, timeout=None):
+        """Wake the worker, wait for its final flush, then drain the rest"""
+        worker = self._worker
+        if worker and worker.is_alive():
+            self._queue.put(_STOP)
+            worker.join(self.flush_interval + 5 if timeout is None else timeout)
+        self.drain()
+
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='analytics-events', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            pending, count, stopping = {}, 0, False
+            deadline = time.monotonic() + self.flush_interval
+            while count < self.flush_events:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                _merge(pending, item)
+                count += 1
+            self._flush(pending, count)
+            if stopping:
+                return
+
+    def _flush(self, pending, count):
+        if not count:
+            return
+        started = time.monotonic()
+        close_old_connections()
+        try:
+            for target, deltas in pending.items():
+                _apply(target, deltas)
+        except Exception:
+            # reconcile_analytics and rebuild_sales_aggregates restore the totals from the source tables
+            logger.exception('Analytics flush of %d event(s) failed', count)
+            with self._lock:
+                self._stats['failed_flushes'] += 1
+            return
+        finally:
+            close_old_connections()
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._stats['flushes'] += 1
+            self._stats['flushed_events'] += count
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+        logger.debug('Flushed %d analytics event(s) in %.1f ms, %d still queued',
+                     count, elapsed_ms, self._queue.qsize())
+
+
+def _merge(pending, item):
+    target, deltas = item
+    merged = pending.setdefault(target, {})
+    for field, value in deltas.items():
+        merged[field] = merged.get(field, 0) + value
+
+
+def _apply(target, deltas):
+    if target is None:
+        apply_analytics_delta(**deltas)
+    else:
+        apply_sales_delta(*target, **deltas)
+
+
+event_queue = AnalyticsEventQueue()
+atexit.register(event_queue.stop)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from analytics.sales import build_sales_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-farmer, per-crop and per-location sales aggregates, correcting any drift from incremental updates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', type=int, action='append', dest='farmers', help='Only rebuild this farmer id (repeatable).')
+
+    def handle(self, *args, **options):
+        written = build_sales_aggregates(options['farmers'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} sales aggregate row(s).'))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from analytics.views import generate_analytics_data
+
+
+class Command(BaseCommand):
+    help = "Recompute today's AnalyticsData snapshot from the source tables, correcting any drift from incremental updates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and reconcile periodically.')
+        parser.add_argument('--interval', type=float, default=3600, help='Seconds to sleep between runs with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            row = generate_analytics_data()
+            self.stdout.write(self.style.SUCCESS(f'Reconciled {row}.'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
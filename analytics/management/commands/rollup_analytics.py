@@ -0,0 +1,28 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from analytics.rollups import build_daily_rollups
+
+
+class Command(BaseCommand):
+    help = 'Build the dense DailyRollup table: recent days by default, or all history with --backfill.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help='Rebuild every day since the first recorded activity.')
+        parser.add_argument('--days', type=int, default=2, help='Number of most recent days (including today) to rebuild.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep running and rebuild the recent days periodically.')
+        parser.add_argument('--interval', type=float, default=900, help='Seconds to sleep between runs with --loop.')
+
+    def handle(self, *args, **options):
+        backfill = options['backfill']
+        while True:
+            start_date = None if backfill else timezone.localdate() - timedelta(days=options['days'] - 1)
+            written = build_daily_rollups(start_date, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Rolled up {written} day(s).'))
+            if not options['loop']:
+                break
+            backfill = False
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_analyticsdata_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('new_users', models.IntegerField(default=0)),
+                ('new_listings', models.IntegerField(default=0)),
+                ('cultivation_bookings', models.IntegerField(default=0)),
+                ('storage_bookings', models.IntegerField(default=0)),
+                ('purchase_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('bid_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cultivation_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('storage_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_dailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop_type', models.CharField(max_length=50)),
+                ('location', models.CharField(max_length=200)),
+                ('listings', models.IntegerField(default=0)),
+                ('listed_qty', models.IntegerField(default=0)),
+                ('regular_qty', models.IntegerField(default=0)),
+                ('regular_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('bid_qty', models.IntegerField(default=0)),
+                ('bid_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('bid_base_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_aggregates', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['crop_type', 'location'],
+                'constraints': [models.UniqueConstraint(fields=('farmer', 'crop_type', 'location'), name='sales_aggregate_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_salesaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropPriceStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop_type', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('window', models.PositiveSmallIntegerField()),
+                ('bid_count', models.IntegerField(default=0)),
+                ('cleared_count', models.IntegerField(default=0)),
+                ('cleared_qty', models.IntegerField(default=0)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+            ],
+            options={
+                'ordering': ['crop_type', 'window', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('crop_type', 'window', 'date'), name='crop_price_stat_key')],
+            },
+        ),
+    ]
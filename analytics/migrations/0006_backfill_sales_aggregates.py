@@ -0,0 +1,64 @@
+from django.db import migrations
+from django.db.models import Count, F, Q, Sum
+
+
+def backfill_sales_aggregates(apps, schema_editor):
+    """
+    0004 created SalesAggregate empty, so on an existing database the first
+    sales delta for a farmer made a row with no listings behind it. Build every
+    row from the listings and completed purchases, spelled out against the
+    historical models like analytics.sales.build_sales_aggregates.
+    """
+    ProductListing = apps.get_model('farmer', 'ProductListing')
+    Purchase = apps.get_model('buyer', 'Purchase')
+    SalesAggregate = apps.get_model('analytics', 'SalesAggregate')
+
+    rows = {}
+
+    def row(farmer_id, crop_type, location):
+        key = (farmer_id, crop_type, location)
+        if key not in rows:
+            rows[key] = SalesAggregate(farmer_id=farmer_id, crop_type=crop_type, location=location)
+        return rows[key]
+
+    for item in (
+        ProductListing.objects.order_by()
+        .values('user_id', 'crop_type', 'location')
+        .annotate(listings=Count('pk'), listed_qty=Sum('quantity'))
+    ):
+        aggregate = row(item['user_id'], item['crop_type'], item['location'])
+        aggregate.listings = item['listings']
+        aggregate.listed_qty = item['listed_qty'] or 0
+
+    regular, bid = Q(purchase_type='regular'), Q(purchase_type='bid')
+    for item in (
+        Purchase.objects.filter(status='payment_completed').order_by()
+        .values('listing__user_id', 'listing__crop_type', 'listing__location')
+        .annotate(
+            regular_qty=Sum('quantity', filter=regular),
+            regular_revenue=Sum('total_price', filter=regular),
+            bid_qty=Sum('quantity', filter=bid),
+            bid_revenue=Sum('total_price', filter=bid),
+            bid_base_value=Sum(F('quantity') * F('listing__price'), filter=bid),
+        )
+    ):
+        aggregate = row(item['listing__user_id'], item['listing__crop_type'], item['listing__location'])
+        for field in ('regular_qty', 'regular_revenue', 'bid_qty', 'bid_revenue', 'bid_base_value'):
+            setattr(aggregate, field, item[field] or 0)
+
+    # Replaces any partial rows deltas wrote before this ran
+    SalesAggregate.objects.all().delete()
+    SalesAggregate.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_croppricestat'),
+        ('buyer', '0006_revenue_date_indexes'),
+        ('farmer', '0013_listing_payment_due_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sales_aggregates, migrations.RunPython.noop),
+    ]
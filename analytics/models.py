@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -14,10 +15,120 @@ class AnalyticsData(models.Model):
     storage_bookings = models.IntegerField(default=0)
     cultivation_bookings = models.IntegerField(default=0)
     active_listings = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date']
         verbose_name_plural = 'Analytics Data'
         
     def __str__(self):
-        return f'Analytics for {self.date}'
\ No newline at end of file
+        return f'Analytics for {self.date}'
+
+class DailyRollup(models.Model):
+    """One row per calendar day (no gaps), built by the rollup_analytics command"""
+    date = models.DateField(unique=True)
+    new_users = models.IntegerField(default=0)
+    new_listings = models.IntegerField(default=0)
+    cultivation_bookings = models.IntegerField(default=0)
+    storage_bookings = models.IntegerField(default=0)
+
+    # Revenue by source, attributed to the day the sale or booking was made
+    purchase_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    bid_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cultivation_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    storage_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f'Rollup for {self.date}'
+
+    @property
+    def total_bookings(self):
+        return self.cultivation_bookings + self.storage_bookings
+
+    @property
+    def total_revenue(self):
+        return self.purchase_revenue + self.bid_revenue + self.cultivation_revenue + self.storage_revenue
+
+
+class SalesAggregate(models.Model):
+    """
+    Marketplace sales per farmer, crop type and location. Kept current by
+    per-event deltas; rebuild_sales_aggregates recomputes it from scratch.
+    """
+    farmer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sales_aggregates')
+    crop_type = models.CharField(max_length=50)
+    location = models.CharField(max_length=200)
+    listings = models.IntegerField(default=0)
+    listed_qty = models.IntegerField(default=0)
+
+    # Completed (paid) sales only
+    regular_qty = models.IntegerField(default=0)
+    regular_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    bid_qty = models.IntegerField(default=0)
+    bid_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # What the bid sales would have fetched at the listings' base price
+    bid_base_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['crop_type', 'location']
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'crop_type', 'location'], name='sales_aggregate_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.farmer} - {self.crop_type} @ {self.location}'
+
+    @property
+    def sold_qty(self):
+        return self.regular_qty + self.bid_qty
+
+    @property
+    def revenue(self):
+        return self.regular_revenue + self.bid_revenue
+
+    @property
+    def average_price(self):
+        return self.revenue / self.sold_qty if self.sold_qty else None
+
+    @property
+    def bid_premium(self):
+        """Percentage paid above base price on bid sales"""
+        if not self.bid_base_value:
+            return None
+        return (self.bid_revenue - self.bid_base_value) * 100 / self.bid_base_value
+
+    @property
+    def sell_through(self):
+        """Percentage of listed quantity sold"""
+        return self.sold_qty * 100 / self.listed_qty if self.listed_qty else None
+
+
+class CropPriceStat(models.Model):
+    """
+    Clearing-price statistics per crop type over a trailing window of days
+    ending on date, built from bid history by the rollup_crop_prices command.
+    """
+    crop_type = models.CharField(max_length=50)
+    date = models.DateField()
+    window = models.PositiveSmallIntegerField()
+    bid_count = models.IntegerField(default=0)
+    # Winning (accepted) bids only
+    cleared_count = models.IntegerField(default=0)
+    cleared_qty = models.IntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    median_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+
+    class Meta:
+        ordering = ['crop_type', 'window', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['crop_type', 'window', 'date'], name='crop_price_stat_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.crop_type} {self.window}d to {self.date}'
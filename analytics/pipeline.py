@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import AnalyticsData, SalesAggregate
+
+# Columns carried forward from the latest snapshot when a new day starts
+SNAPSHOT_FIELDS = [
+    'total_users', 'total_revenue', 'total_bookings', 'total_listings', 'farmer_count',
+    'buyer_count', 'storage_bookings', 'cultivation_bookings', 'active_listings',
+]
+
+REVENUE_BOOKING_STATUSES = ('approved', 'completed')
+
+
+def apply_analytics_delta(**deltas):
+    """
+    Add per-event deltas (e.g. total_listings=1, total_revenue=Decimal('250'))
+    to today's AnalyticsData row with a single F() UPDATE. A new day starts
+    from the latest snapshot; the reconcile_analytics command corrects drift.
+    """
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    with transaction.atomic():
+        row, recomputed = _today_row()
+        if recomputed:
+            return  # Full recompute already includes this event
+        AnalyticsData.objects.filter(pk=row.pk).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + value for field, value in deltas.items()}
+        )
+
+
+def _today_row():
+    from .views import generate_analytics_data
+    today = timezone.now().date()
+    row = AnalyticsData.objects.filter(date=today).first()
+    if row:
+        return row, False
+
+    latest = AnalyticsData.objects.order_by('-date').first()
+    if latest is None:
+        return generate_analytics_data(), True
+    row, _ = AnalyticsData.objects.get_or_create(
+        date=today,
+        defaults={field: getattr(latest, field) for field in SNAPSHOT_FIELDS},
+    )
+    return row, False
+
+
+def apply_sales_delta(farmer_id, crop_type, location, **deltas):
+    """Add deltas to one SalesAggregate row with a single F() UPDATE, creating the row if needed"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    row = SalesAggregate.objects.filter(farmer_id=farmer_id, crop_type=crop_type, location=location)
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    with transaction.atomic():
+        if row.update(updated_at=timezone.now(), **changes):
+            return
+        # Deleting a farmer cascades to their listings; nothing left to track then
+        if not get_user_model().objects.filter(pk=farmer_id).exists():
+            return
+        SalesAggregate.objects.get_or_create(farmer_id=farmer_id, crop_type=crop_type, location=location)
+        row.update(updated_at=timezone.now(), **changes)
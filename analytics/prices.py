@@ -0,0 +1,93 @@
+import bisect
+from collections import defaultdict, deque
+from datetime import timedelta
+from decimal import Decimal
+from statistics import median
+
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from farmer.models import Bid
+from .models import CropPriceStat
+from .revenue import date_range_filter
+
+# Trailing windows, in days, kept for every crop
+PRICE_WINDOWS = (1, 7, 30)
+
+
+def build_crop_price_stats(start_date=None, end_date=None, batch_size=1000):
+    """
+    Rebuild CropPriceStat rows for days start_date..end_date (default: all
+    bid history up to today). Bids are streamed once, ordered by crop and
+    day, and each window slides over them keeping a sorted list of clearing
+    prices, so medians are exact without re-reading any bid. Returns the
+    number of rows written.
+    """
+    end_date = end_date or timezone.localdate()
+    bids = Bid.objects.filter(**date_range_filter(
+        'placed_at', start_date and start_date - timedelta(days=max(PRICE_WINDOWS) - 1), end_date,
+    ))
+    rows = (
+        bids.annotate(day=TruncDate('placed_at'))
+        .order_by('listing__crop_type', 'day')
+        .values_list('listing__crop_type', 'day', 'amount', 'quantity', 'is_accepted')
+        .iterator(chunk_size=batch_size)
+    )
+
+    # crop -> day -> [bid count, [(amount, quantity) of winning bids]]
+    days = defaultdict(lambda: defaultdict(lambda: [0, []]))
+    for crop_type, day, amount, quantity, is_accepted in rows:
+        entry = days[crop_type][day]
+        entry[0] += 1
+        if is_accepted:
+            entry[1].append((amount, quantity))
+
+    stats = []
+    for crop_type, by_day in days.items():
+        first_day = start_date or min(by_day)
+        for window in PRICE_WINDOWS:
+            stats.extend(_window_stats(crop_type, by_day, window, first_day, end_date))
+
+    scope = CropPriceStat.objects.filter(date__lte=end_date)
+    if start_date:
+        scope = scope.filter(date__gte=start_date)
+    with transaction.atomic():
+        scope.delete()
+        CropPriceStat.objects.bulk_create(stats, batch_size=batch_size)
+    return len(stats)
+
+
+def _window_stats(crop_type, by_day, window, first_day, end_date):
+    """Slide a window-day frame over by_day, yielding a row for each day with activity in the frame"""
+    prices = []        # sorted clearing prices inside the frame
+    frame = deque()    # (day, bid count, winning bids) inside the frame
+    bid_count = cleared_qty = 0
+
+    day = first_day - timedelta(days=window - 1)
+    while day <= end_date:
+        count, cleared = by_day.get(day, (0, []))
+        frame.append((day, count, cleared))
+        bid_count += count
+        for amount, quantity in cleared:
+            bisect.insort(prices, amount)
+            cleared_qty += quantity
+        while frame[0][0] <= day - timedelta(days=window):
+            _, old_count, old_cleared = frame.popleft()
+            bid_count -= old_count
+            for amount, quantity in old_cleared:
+                del prices[bisect.bisect_left(prices, amount)]
+                cleared_qty -= quantity
+
+        if day >= first_day and bid_count:
+            yield CropPriceStat(
+                crop_type=crop_type,
+                date=day,
+                window=window,
+                bid_count=bid_count,
+                cleared_count=len(prices),
+                cleared_qty=cleared_qty,
+                min_price=prices[0] if prices else None,
+                median_price=Decimal(median(prices)).quantize(Decimal('0.01')) if prices else None,
+                max_price=prices[-1] if prices else None,
+            )
+        day += timedelta(days=1)
@@ -0,0 +1,82 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import CharField, DecimalField, F, Sum, Value
+from django.utils import timezone
+from buyer.models import Purchase
+from farmer.models import CultivationBooking, StorageBooking, Bid
+from .pipeline import REVENUE_BOOKING_STATUSES
+
+REVENUE_SOURCES = ('purchases', 'bids', 'cultivation', 'storage')
+
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def revenue_breakdown(request=None, start_date=None, end_date=None):
+    """
+    Revenue per source plus 'total', optionally limited to an inclusive date
+    range. All four sources are summed in one UNION ALL query, and the result
+    is memoized on request so every caller in the same request shares it.
+    """
+    if request is None:
+        return _query_breakdown(start_date, end_date)
+    memo = request.__dict__.setdefault('_revenue_breakdown', {})
+    key = (start_date, end_date)
+    if key not in memo:
+        memo[key] = _query_breakdown(start_date, end_date)
+    return memo[key]
+
+
+def revenue_sources():
+    """(name, queryset, date field, value expression) for every revenue source"""
+    return [
+        ('cultivation', CultivationBooking.objects.filter(status__in=REVENUE_BOOKING_STATUSES),
+         'booked_at', F('total_price')),
+        ('storage', StorageBooking.objects.filter(status__in=REVENUE_BOOKING_STATUSES),
+         'booked_at', F('total_price')),
+        # Bid purchases are counted through their Bid, so only regular purchases here
+        ('purchases', Purchase.objects.filter(status='payment_completed', purchase_type='regular'),
+         'purchase_date', F('total_price')),
+        ('bids', Bid.objects.filter(is_accepted=True, payment_status='completed'),
+         'placed_at', F('amount') * F('quantity')),
+    ]
+
+
+def date_range_filter(field, start_date=None, end_date=None):
+    """
+    Filter kwargs covering local calendar days start_date..end_date inclusive,
+    as half-open datetime bounds [start 00:00, day after end 00:00) in
+    TIME_ZONE. Unlike __date lookups these compare the raw column, so an
+    index on it (or ending in it) can be used.
+    """
+    bounds = {}
+    if start_date:
+        bounds[f'{field}__gte'] = day_start(start_date)
+    if end_date:
+        bounds[f'{field}__lt'] = day_start(end_date + timedelta(days=1))
+    return bounds
+
+
+def day_start(day):
+    """Aware midnight at the start of day in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _query_breakdown(start_date, end_date):
+    parts = []
+    for name, queryset, date_field, value in revenue_sources():
+        if start_date and end_date:
+            queryset = queryset.filter(**date_range_filter(date_field, start_date, end_date))
+        parts.append(
+            queryset.order_by()
+            .annotate(source=Value(name, output_field=CharField()))
+            .values('source')
+            .annotate(total=Sum(value, output_field=_MONEY))
+            .values_list('source', 'total')
+        )
+
+    breakdown = dict.fromkeys(REVENUE_SOURCES, Decimal('0'))
+    for name, total in parts[0].union(*parts[1:], all=True):
+        breakdown[name] = Decimal(total or 0)
+    breakdown['total'] = sum(breakdown[name] for name in REVENUE_SOURCES)
+    return breakdown
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from accounts.models import CustomUser
+from farmer.models import ProductListing, CultivationBooking, StorageBooking
+from .models import DailyRollup
+from .revenue import date_range_filter, revenue_sources
+
+REVENUE_COLUMNS = {
+    'purchases': 'purchase_revenue',
+    'bids': 'bid_revenue',
+    'cultivation': 'cultivation_revenue',
+    'storage': 'storage_revenue',
+}
+
+ROLLUP_FIELDS = [
+    'new_users', 'new_listings', 'cultivation_bookings', 'storage_bookings',
+    *REVENUE_COLUMNS.values(),
+]
+
+
+def build_daily_rollups(start_date=None, end_date=None, batch_size=500):
+    """
+    Rebuild DailyRollup rows for start_date..end_date inclusive (default: all
+    history up to today) with one GROUP BY day query per source table, then
+    upsert one row for every day in the range, including empty ones.
+    Returns the number of days written.
+    """
+    end_date = end_date or timezone.localdate()
+    counted = [
+        ('new_users', CustomUser.objects.all(), 'date_joined', Count('pk')),
+        ('new_listings', ProductListing.objects.all(), 'created_at', Count('pk')),
+        ('cultivation_bookings', CultivationBooking.objects.all(), 'booked_at', Count('pk')),
+        ('storage_bookings', StorageBooking.objects.all(), 'booked_at', Count('pk')),
+    ]
+    counted += [
+        (REVENUE_COLUMNS[name], queryset, date_field, Sum(value))
+        for name, queryset, date_field, value in revenue_sources()
+    ]
+
+    days = {}
+    for column, queryset, date_field, aggregate in counted:
+        queryset = queryset.filter(**date_range_filter(date_field, start_date, end_date))
+        grouped = (
+            queryset.order_by()
+            .annotate(day=TruncDate(date_field))
+            .values('day')
+            .annotate(value=aggregate)
+            .values_list('day', 'value')
+        )
+        for day, value in grouped:
+            days.setdefault(day, {})[column] = value or 0
+
+    start_date = start_date or min(days, default=end_date)
+    rows = []
+    day = start_date
+    while day <= end_date:
+        rows.append(DailyRollup(date=day, **days.get(day, {})))
+        day += timedelta(days=1)
+
+    DailyRollup.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=[*ROLLUP_FIELDS, 'updated_at'],
+    )
+    return len(rows)
+
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from buyer.models import Purchase
+from farmer.models import ProductListing
+from .models import SalesAggregate
+
+
+def build_sales_aggregates(farmer_ids=None):
+    """
+    Recompute SalesAggregate rows from the listings and completed purchases,
+    for every farmer or just farmer_ids. One grouped query per source table.
+    Returns the number of rows written.
+    """
+    listings = ProductListing.objects.all()
+    purchases = Purchase.objects.filter(status='payment_completed')
+    existing = SalesAggregate.objects.all()
+    if farmer_ids is not None:
+        listings = listings.filter(user_id__in=farmer_ids)
+        purchases = purchases.filter(listing__user_id__in=farmer_ids)
+        existing = existing.filter(farmer_id__in=farmer_ids)
+
+    rows = {}
+
+    def row(farmer_id, crop_type, location):
+        key = (farmer_id, crop_type, location)
+        if key not in rows:
+            rows[key] = SalesAggregate(farmer_id=farmer_id, crop_type=crop_type, location=location)
+        return rows[key]
+
+    for item in (
+        listings.order_by()
+        .values('user_id', 'crop_type', 'location')
+        .annotate(listings=Count('pk'), listed_qty=Sum('quantity'))
+    ):
+        aggregate = row(item['user_id'], item['crop_type'], item['location'])
+        aggregate.listings = item['listings']
+        aggregate.listed_qty = item['listed_qty'] or 0
+
+    regular, bid = Q(purchase_type='regular'), Q(purchase_type='bid')
+    for item in (
+        purchases.order_by()
+        .values('listing__user_id', 'listing__crop_type', 'listing__location')
+        .annotate(
+            regular_qty=Sum('quantity', filter=regular),
+            regular_revenue=Sum('total_price', filter=regular),
+            bid_qty=Sum('quantity', filter=bid),
+            bid_revenue=Sum('total_price', filter=bid),
+            bid_base_value=Sum(F('quantity') * F('listing__price'), filter=bid),
+        )
+    ):
+        aggregate = row(item['listing__user_id'], item['listing__crop_type'], item['listing__location'])
+        for field in ('regular_qty', 'regular_revenue', 'bid_qty', 'bid_revenue', 'bid_base_value'):
+            setattr(aggregate, field, item[field] or 0)
+
+    with transaction.atomic():
+        existing.delete()
+        SalesAggregate.objects.bulk_create(rows.values(), batch_size=500)
+    return len(rows)
@@ -1,19 +1,96 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
 from accounts.models import CustomUser
 from farmer.models import ProductListing
 from farmer.models import CultivationBooking, StorageBooking
-from .models import AnalyticsData
-from .views import generate_analytics_data
-
-@receiver([post_save, post_delete], sender=CustomUser)
-@receiver([post_save, post_delete], sender=ProductListing)
-@receiver([post_save, post_delete], sender=CultivationBooking)
-@receiver([post_save, post_delete], sender=StorageBooking)
-def update_analytics(sender, **kwargs):
-    """
-    Update analytics data whenever there's a change in users, listings, or bookings
-    """
-    today = timezone.now().date()
-    generate_analytics_data()
\ No newline at end of file
+from .events import record_analytics_delta, record_sales_delta
+from .pipeline import REVENUE_BOOKING_STATUSES
+
+LISTING_SNAPSHOT_FIELDS = ['is_active', 'quantity', 'crop_type', 'location']
+
+BOOKING_COUNTERS = {
+    CultivationBooking: 'cultivation_bookings',
+    StorageBooking: 'storage_bookings',
+}
+
+
+@receiver([pre_save, pre_delete], sender=ProductListing)
+@receiver([pre_save, pre_delete], sender=CultivationBooking)
+@receiver([pre_save, pre_delete], sender=StorageBooking)
+def remember_previous_state(sender, instance, **kwargs):
+    """Snapshot the stored columns so post_save / post_delete can work out the delta"""
+    fields = LISTING_SNAPSHOT_FIELDS if sender is ProductListing else ['status', 'total_price']
+    instance._analytics_previous = None
+    if instance.pk:
+        instance._analytics_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def update_user_analytics(sender, instance, created=False, **kwargs):
+    sign = _event_sign(created, kwargs)
+    if sign:
+        record_analytics_delta(
+            total_users=sign,
+            farmer_count=sign if instance.role == 'farmer' else 0,
+            buyer_count=sign if instance.role == 'buyer' else 0,
+        )
+
+
+@receiver(post_save, sender=ProductListing)
+@receiver(post_delete, sender=ProductListing)
+def update_listing_analytics(sender, instance, created=False, **kwargs):
+    previous = getattr(instance, '_analytics_previous', None)
+    sign = _event_sign(created, kwargs)
+    if sign:
+        stored = previous if previous and sign < 0 else {field: getattr(instance, field) for field in LISTING_SNAPSHOT_FIELDS}
+        record_analytics_delta(total_listings=sign, active_listings=sign if stored['is_active'] else 0)
+        record_sales_delta(
+            instance.user_id, stored['crop_type'], stored['location'],
+            listings=sign, listed_qty=sign * stored['quantity'],
+        )
+        return
+
+    if not previous:
+        return
+    if previous['is_active'] != instance.is_active:
+        record_analytics_delta(active_listings=1 if instance.is_active else -1)
+    if any(previous[field] != getattr(instance, field) for field in ('quantity', 'crop_type', 'location')):
+        # Move the listing's stock between aggregate rows; past sales stay where they were booked
+        record_sales_delta(instance.user_id, previous['crop_type'], previous['location'],
+                           listings=-1, listed_qty=-previous['quantity'])
+        record_sales_delta(instance.user_id, instance.crop_type, instance.location,
+                           listings=1, listed_qty=instance.quantity)
+
+
+@receiver(post_save, sender=CultivationBooking)
+@receiver(post_delete, sender=CultivationBooking)
+@receiver(post_save, sender=StorageBooking)
+@receiver(post_delete, sender=StorageBooking)
+def update_booking_analytics(sender, instance, created=False, **kwargs):
+    counter = BOOKING_COUNTERS[sender]
+    previous = getattr(instance, '_analytics_previous', None)
+    sign = _event_sign(created, kwargs)
+    if sign:
+        stored = previous if previous and sign < 0 else {'status': instance.status, 'total_price': instance.total_price}
+        earns = stored['status'] in REVENUE_BOOKING_STATUSES
+        record_analytics_delta(**{
+            'total_bookings': sign,
+            counter: sign,
+            'total_revenue': sign * stored['total_price'] if earns else 0,
+        })
+        return
+
+    if previous:
+        before = previous['total_price'] if previous['status'] in REVENUE_BOOKING_STATUSES else 0
+        after = instance.total_price if instance.status in REVENUE_BOOKING_STATUSES else 0
+        record_analytics_delta(total_revenue=after - before)
+
+
+def _event_sign(created, signal_kwargs):
+    """+1 for a new row, -1 for a deleted row, 0 for an update"""
+    if created:
+        return 1
+    if signal_kwargs['signal'] is post_delete:
+        return -1
+    return 0
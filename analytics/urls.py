@@ -6,5 +6,7 @@ app_name = 'analytics'
 urlpatterns = [
     path('', views.analytics_dashboard, name='dashboard'),
     path('api/data/', views.get_analytics_data, name='get_data'),
+    path('api/refresh/', views.refresh_analytics, name='refresh'),
     path('api/filter-data/', views.get_filtered_data, name='filter_data'),
+    path('api/crop-prices/', views.crop_prices, name='crop_prices'),
 ]
\ No newline at end of file
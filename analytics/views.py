@@ -1,17 +1,35 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import render
-from django.db.models import Sum
-from buyer.models import Purchase
 from django.http import JsonResponse
-from django.contrib.auth.decorators import user_passes_test
-from django.db.models import Count
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_POST
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Coalesce, Trunc
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import AnalyticsData
+from decimal import Decimal
+from .models import AnalyticsData, CropPriceStat, DailyRollup
 from accounts.models import CustomUser
 from farmer.models import ProductListing
 from farmer.models import CultivationBooking, StorageBooking
-from django.db.models import Sum, F
-from farmer.models import Bid  # you forgot this import
+from .revenue import revenue_breakdown, REVENUE_SOURCES
+from .rollups import REVENUE_COLUMNS
+from .prices import PRICE_WINDOWS
+
+# Dashboard summaries may be served this many seconds out of date
+MAX_STALENESS = getattr(settings, 'ANALYTICS_MAX_STALENESS', 60)
+SNAPSHOT_CACHE_KEY = 'analytics:dashboard:snapshot'
+
+# Chart series: the finest granularity first; coarser ones are used once a
+# period would need more than MAX_CHART_POINTS points
+GRANULARITIES = ('day', 'week', 'month')
+MAX_PERIOD_DAYS = getattr(settings, 'ANALYTICS_MAX_PERIOD_DAYS', 3650)
+MAX_CHART_POINTS = getattr(settings, 'ANALYTICS_MAX_CHART_POINTS', 400)
 
 
 def is_admin(user):
@@ -21,35 +39,16 @@ def is_admin(user):
 def analytics_dashboard(request):
     return render(request, 'analytics/dashboard.html')
 
-@user_passes_test(is_admin)
-def get_analytics_data(request):
-    # Force regenerate analytics data to get fresh numbers
-    latest_data = generate_analytics_data()
+def _snapshot_payload(request):
+    """Dashboard summary built from the stored snapshot; performs no writes"""
+    latest_data = AnalyticsData.objects.order_by('-date').first() or AnalyticsData()
     
-    # Calculate current revenue components
-    cultivation_revenue = CultivationBooking.objects.filter(
-        status__in=['approved', 'completed']
-    ).aggregate(total=Sum('total_price'))['total'] or 0
+    # Current revenue components, in one query
+    revenue = revenue_breakdown(request)
     
-    storage_revenue = StorageBooking.objects.filter(
-        status__in=['approved', 'completed']
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    purchase_revenue = Purchase.objects.filter(
-        status='payment_completed',
-        purchase_type='regular'
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    bid_revenue = Bid.objects.filter(
-        is_accepted=True,
-        payment_status='completed'
-    ).aggregate(total=Sum(F('amount') * F('quantity')))['total'] or 0
-    
-    total_revenue = float(cultivation_revenue) + float(storage_revenue) + float(purchase_revenue) + float(bid_revenue or 0)
-    
-    data = {
+    return {
         'total_users': CustomUser.objects.filter(is_superuser=False, is_approved=True).count(),
-        'total_revenue': total_revenue,
+        'total_revenue': float(revenue['total']),
         'total_bookings': latest_data.total_bookings,
         'total_listings': latest_data.total_listings,
         'farmer_count': latest_data.farmer_count,
@@ -57,76 +56,174 @@ def get_analytics_data(request):
         'storage_bookings': latest_data.storage_bookings,
         'cultivation_bookings': latest_data.cultivation_bookings,
         'active_listings': latest_data.active_listings,
-        'revenue_breakdown': {
-            'purchases': float(purchase_revenue),
-            'bids': float(bid_revenue or 0),
-            'cultivation': float(cultivation_revenue),
-            'storage': float(storage_revenue)
-        }
+        'revenue_breakdown': _breakdown_json(revenue),
+        'updated_at': (latest_data.updated_at or timezone.now()).isoformat(),
     }
-    
-    return JsonResponse(data)
+
+
+def _cached_snapshot(request):
+    """
+    Serve the summary from the cache for up to ANALYTICS_MAX_STALENESS seconds,
+    so any number of admins polling the dashboard cost one rebuild per window.
+    """
+    if not hasattr(request, '_analytics_snapshot'):
+        snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+        if snapshot is None:
+            payload = _snapshot_payload(request)
+            snapshot = {
+                'payload': payload,
+                'etag': hashlib.md5(json.dumps(payload, sort_keys=True).encode()).hexdigest(),
+                'last_modified': datetime.fromisoformat(payload['updated_at']),
+            }
+            cache.set(SNAPSHOT_CACHE_KEY, snapshot, MAX_STALENESS)
+        request._analytics_snapshot = snapshot
+    return request._analytics_snapshot
+
+
+@user_passes_test(is_admin)
+@condition(
+    etag_func=lambda request: _cached_snapshot(request)['etag'],
+    last_modified_func=lambda request: _cached_snapshot(request)['last_modified'],
+)
+def get_analytics_data(request):
+    response = JsonResponse(_cached_snapshot(request)['payload'])
+    # Let the browser keep the body but revalidate it with If-None-Match each poll
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@user_passes_test(is_admin)
+@require_POST
+def refresh_analytics(request):
+    """Explicit recompute of today's snapshot from the source tables"""
+    generate_analytics_data(request)
+    cache.delete(SNAPSHOT_CACHE_KEY)
+    return JsonResponse(_cached_snapshot(request)['payload'])
 
 @user_passes_test(is_admin)
 def get_filtered_data(request):
-    period = request.GET.get('period', '30')  # Default to last 30 days
-    days = int(period)
+    try:
+        days = int(request.GET.get('period', '30'))  # Default to last 30 days
+    except ValueError:
+        days = 0
+    if not 1 <= days <= MAX_PERIOD_DAYS:
+        return JsonResponse({'error': f'period must be between 1 and {MAX_PERIOD_DAYS} days.'}, status=400)
+    
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return JsonResponse({'error': f'granularity must be one of {", ".join(GRANULARITIES)}.'}, status=400)
     
-    end_date = timezone.now().date()
+    # Rollup days are local calendar days
+    end_date = timezone.localdate()
     start_date = end_date - timedelta(days=days)
     
-    # Calculate revenue from cultivation bookings
-    cultivation_revenue = CultivationBooking.objects.filter(
-        status__in=['approved', 'completed'],
-        booked_at__date__range=[start_date, end_date]
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # Calculate revenue from storage bookings
-    storage_revenue = StorageBooking.objects.filter(
-        status__in=['approved', 'completed'],
-        booked_at__date__range=[start_date, end_date]
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # Calculate revenue from regular purchases (excluding bids)
-    purchase_revenue = Purchase.objects.filter(
-        status='payment_completed',
-        purchase_type='regular',
-        purchase_date__date__range=[start_date, end_date]
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # Calculate revenue from bids
-    bid_revenue = Bid.objects.filter(
-        is_accepted=True,
-        payment_status='completed',
-        created_at__date__range=[start_date, end_date]
-    ).aggregate(total=Sum(F('amount') * F('quantity')))['total'] or 0
-    
-    # Calculate total revenue
-    purchase_revenue_total = float(purchase_revenue + (bid_revenue or 0))
-    total_revenue = purchase_revenue_total + float(cultivation_revenue) + float(storage_revenue)
-    
-    data = AnalyticsData.objects.filter(
-        date__range=[start_date, end_date]
-    ).order_by('date')
-    
-    response_data = {
-        'labels': [item.date.strftime('%Y-%m-%d') for item in data],
-        'users': [item.total_users for item in data],
-        'revenue': [float(item.total_revenue) for item in data],
-        'bookings': [item.total_bookings for item in data],
-        'listings': [item.total_listings for item in data],
-        'total_revenue': float(total_revenue),
-        'revenue_breakdown': {
-            'purchases': float(purchase_revenue),
-            'bids': float(bid_revenue or 0),
-            'cultivation': float(cultivation_revenue),
-            'storage': float(storage_revenue)
-        }
+    # Coarsen until the series fits in MAX_CHART_POINTS
+    for granularity in GRANULARITIES[GRANULARITIES.index(granularity):]:
+        buckets = _bucket_starts(start_date, end_date, granularity)
+        if len(buckets) <= MAX_CHART_POINTS:
+            break
+    
+    sums = {column: Coalesce(Sum(column), 0) for column in ('new_users', 'new_listings', 'cultivation_bookings', 'storage_bookings')}
+    sums.update({column: Coalesce(Sum(column), Decimal('0')) for column in REVENUE_COLUMNS.values()})
+    rollups = {
+        row['bucket']: row
+        for row in DailyRollup.objects.filter(date__range=[start_date, end_date])
+        .annotate(bucket=Trunc('date', granularity, output_field=DateField()))
+        .values('bucket')
+        .annotate(**sums)
+        .order_by()
     }
     
-    return JsonResponse(response_data)
+    # Running totals start from everything rolled up before the period
+    running = DailyRollup.objects.filter(date__lt=start_date).aggregate(
+        users=Coalesce(Sum('new_users'), 0),
+        bookings=Coalesce(Sum(F('cultivation_bookings') + F('storage_bookings')), 0),
+        listings=Coalesce(Sum('new_listings'), 0),
+        revenue=Coalesce(Sum(
+            F('purchase_revenue') + F('bid_revenue') + F('cultivation_revenue') + F('storage_revenue')
+        ), Decimal('0')),
+    )
+    revenue = dict.fromkeys(REVENUE_SOURCES, Decimal('0'))
+    
+    response_data = {'granularity': granularity, 'labels': [], 'users': [], 'revenue': [], 'bookings': [], 'listings': []}
+    for bucket in buckets:
+        # Buckets the rollup job has not reached yet count as empty
+        item = rollups.get(bucket, {})
+        running['users'] += item.get('new_users', 0)
+        running['bookings'] += item.get('cultivation_bookings', 0) + item.get('storage_bookings', 0)
+        running['listings'] += item.get('new_listings', 0)
+        for source, column in REVENUE_COLUMNS.items():
+            revenue[source] += item.get(column, 0)
+            running['revenue'] += item.get(column, 0)
+        
+        response_data['labels'].append(bucket.isoformat())
+        response_data['users'].append(running['users'])
+        response_data['revenue'].append(float(running['revenue']))
+        response_data['bookings'].append(running['bookings'])
+        response_data['listings'].append(running['listings'])
+    
+    response_data['total_revenue'] = float(sum(revenue.values()))
+    response_data['revenue_breakdown'] = _breakdown_json(revenue)
+    
+    return JsonResponse(response_data, json_dumps_params={'separators': (',', ':')})
+
+
+def _bucket_starts(start_date, end_date, granularity):
+    """First day of every day/week/month bucket touching start_date..end_date, matching Trunc()"""
+    if granularity == 'week':
+        day, step = start_date - timedelta(days=start_date.weekday()), timedelta(weeks=1)
+    elif granularity == 'month':
+        day, step = start_date.replace(day=1), None
+    else:
+        day, step = start_date, timedelta(days=1)
+    buckets = []
+    while day <= end_date:
+        buckets.append(day)
+        if step:
+            day += step
+        else:
+            day = (day + timedelta(days=32)).replace(day=1)
+    return buckets
 
-def generate_analytics_data():
+
+@login_required
+def crop_prices(request):
+    """Clearing price series for one crop over a trailing window, as columnar JSON"""
+    crop_type = request.GET.get('crop_type', '').strip()
+    if not crop_type:
+        return JsonResponse({'error': 'crop_type is required.'}, status=400)
+    try:
+        window = int(request.GET.get('window', '7'))
+        days = int(request.GET.get('period', '90'))
+    except ValueError:
+        window = days = 0
+    if window not in PRICE_WINDOWS:
+        return JsonResponse({'error': f'window must be one of {", ".join(map(str, PRICE_WINDOWS))}.'}, status=400)
+    if not 1 <= days <= MAX_PERIOD_DAYS:
+        return JsonResponse({'error': f'period must be between 1 and {MAX_PERIOD_DAYS} days.'}, status=400)
+    
+    rows = CropPriceStat.objects.filter(
+        crop_type=crop_type,
+        window=window,
+        date__gte=timezone.localdate() - timedelta(days=days),
+    ).order_by('date').values_list('date', 'bid_count', 'cleared_qty', 'min_price', 'median_price', 'max_price')
+    
+    series = {'crop_type': crop_type, 'window': window, 'dates': [], 'bids': [], 'cleared_qty': [],
+              'min': [], 'median': [], 'max': []}
+    for date, bid_count, cleared_qty, low, mid, high in rows:
+        series['dates'].append(date.isoformat())
+        series['bids'].append(bid_count)
+        series['cleared_qty'].append(cleared_qty)
+        series['min'].append(low and float(low))
+        series['median'].append(mid and float(mid))
+        series['max'].append(high and float(high))
+    
+    response = JsonResponse(series, json_dumps_params={'separators': (',', ':')})
+    # The stats only change when the rollup job runs
+    patch_cache_control(response, private=True, max_age=300)
+    return response
+
+def generate_analytics_data(request=None):
     """Generate analytics data for the current day"""
     today = timezone.now().date()
     
@@ -145,7 +242,7 @@ def generate_analytics_data():
     active_listings = ProductListing.objects.filter(is_active=True).count()
     
     # Calculate total revenue (you'll need to adjust this based on your business logic)
-    total_revenue = calculate_total_revenue()
+    total_revenue = calculate_total_revenue(request)
     
     # Create or update analytics data
     analytics_data, created = AnalyticsData.objects.get_or_create(
@@ -177,32 +274,11 @@ def generate_analytics_data():
         analytics_data.save()
     
     return analytics_data
-from django.db import models
-from django.db.models import Sum, F
-from buyer.models import Purchase
-from farmer.models import CultivationBooking, StorageBooking, Bid
-
-def calculate_total_revenue():
-    # Get cultivation revenue
-    cultivation_rev = CultivationBooking.objects.filter(
-        status__in=["approved", "completed"]
-    ).aggregate(total=Sum("total_price"))["total"] or 0
-
-    # Get storage revenue
-    storage_rev = StorageBooking.objects.filter(
-        status__in=["approved", "completed"]
-    ).aggregate(total=Sum("total_price"))["total"] or 0
-
-    # Get regular purchase revenue (exclude bid type purchases to avoid duplicate count)
-    purchase_rev = Purchase.objects.filter(
-        status="payment_completed",
-        purchase_type="regular"
-    ).aggregate(total=Sum("total_price"))["total"] or 0
-
-    # Get bid revenue
-    bid_rev = Bid.objects.filter(
-        is_accepted=True,
-        payment_status="completed"
-    ).aggregate(total=Sum(F("amount") * F("quantity")))["total"] or 0
-
-    return float(cultivation_rev + storage_rev + purchase_rev + bid_rev)
\ No newline at end of file
+
+
+def calculate_total_revenue(request=None):
+    return float(revenue_breakdown(request)['total'])
+
+
+def _breakdown_json(revenue):
+    return {source: float(revenue[source]) for source in REVENUE_SOURCES}
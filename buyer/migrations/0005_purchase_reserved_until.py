@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buyer', '0004_rename_bid_purchase_related_bid_and_more'),
+        ('farmer', '0010_productlisting_reserved_qty'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['status', 'reserved_until'], name='purchase_reservation_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buyer', '0005_purchase_reserved_until'),
+        ('farmer', '0010_productlisting_reserved_qty'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['status', 'purchase_type', 'purchase_date'], name='purchase_revenue_date_idx'),
+        ),
+    ]
@@ -50,6 +50,14 @@ class Purchase(models.Model):
     ], default='pending_payment')
     payment = models.OneToOneField(Payment, on_delete=models.SET_NULL, null=True, blank=True)
     related_bid = models.ForeignKey(Bid, on_delete=models.SET_NULL, null=True, blank=True)
+    # Set for regular purchases that hold stock until paid; see ProductListing.reserve
+    reserved_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'reserved_until'], name='purchase_reservation_idx'),
+            models.Index(fields=['status', 'purchase_type', 'purchase_date'], name='purchase_revenue_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.buyer.username} - {self.listing.name}"
@@ -1,10 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from buyer.models import Payment
 from django.dispatch import receiver
-from django.core.mail import send_mail
-from django.utils import timezone
-from analytics.views import calculate_total_revenue  # make sure path is correct
-from analytics.models import AnalyticsData
+from analytics.events import record_analytics_delta
 from django.conf import settings
 from .models import Purchase
 from farmer.models import Bid
@@ -12,117 +9,54 @@ from farmer.models import Bid
 # buyer/signals.py (UPDATED notifications only)
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.conf import settings
+from notifications.outbox import queue_email
 from .models import Purchase
 from farmer.models import Bid
 
 @receiver(post_save, sender=Purchase)
 def purchase_notification(sender, instance, created, **kwargs):
     if created:
-        send_mail(
+        queue_email(
             'Purchase Initiated',
             f'Your purchase of {instance.quantity} units of {instance.listing.name} was created. Complete payment to confirm.',
             settings.DEFAULT_FROM_EMAIL,
             [instance.buyer.email],
-            fail_silently=True,
         )
-        send_mail(
+        queue_email(
             'New Purchase Initiated',
             f'{instance.buyer.username} initiated a purchase of {instance.quantity} units of your {instance.listing.name}.',
             settings.DEFAULT_FROM_EMAIL,
             [instance.listing.user.email],
-            fail_silently=True,
         )
 
 @receiver(post_save, sender=Bid)
 def bid_notification(sender, instance, created, **kwargs):
     if created:
-        send_mail(
+        # Queued in the bid's transaction: a bid that loses the race is rolled back with its mail
+        queue_email(
             'New Bid Placed',
             f'Your bid of ₹{instance.amount} on {instance.listing.name} has been placed.',
             settings.DEFAULT_FROM_EMAIL,
             [instance.bidder.email],
-            fail_silently=True,
         )
-        send_mail(
+        queue_email(
             'New Bid on Your Listing',
             f'{instance.bidder.username} placed a bid of ₹{instance.amount} on {instance.listing.name}.',
             settings.DEFAULT_FROM_EMAIL,
             [instance.listing.user.email],
-            fail_silently=True,
         )
 
 
-# farmer/signals.py
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.utils import timezone
-from django.db import transaction
-from farmer.models import ProductListing, Bid
-from buyer.models import Purchase
-
-@receiver(post_save, sender=Bid)
-def close_if_expired(sender, instance, **kwargs):
-    listing = instance.listing
-
-    # Stop if already inactive or has no bid end time
-    if not listing.is_active or not listing.bid_end_time:
-        return
-
-    # Stop if the bid time hasn’t expired yet
-    if listing.bid_end_time >= timezone.now():
-        return
-
-    # Prevent recursive signal triggering
-    if getattr(listing, "_closing", False):
-        return
-
-    listing._closing = True
-
-    try:
-        with transaction.atomic():
-            listing.refresh_from_db()
-
-            if not listing.is_active:
-                return  # Already closed elsewhere
-
-            highest_bid = listing.highest_bid
-            if highest_bid:
-                # Mark bid as accepted
-                highest_bid.is_accepted = True
-                highest_bid.save(update_fields=["is_accepted"])
-
-                # ✅ Create purchase if not exists, or update if needed
-                purchase, created = Purchase.objects.get_or_create(
-                    buyer=highest_bid.bidder,
-                    listing=listing,
-                    defaults={
-                        "quantity": listing.quantity,
-                        "total_price": highest_bid.amount,
-                    },
-                )
-                if not created:
-                    purchase.quantity = listing.quantity
-                    purchase.total_price = highest_bid.amount
-                    purchase.save(update_fields=["quantity", "total_price"])
-
-            # Close the listing safely
-            listing.is_active = False
-            listing.save(update_fields=["is_active"])
-
-    finally:
-        # Always clean up the temporary flag
-        if hasattr(listing, "_closing"):
-            del listing._closing
-
+# --- NEW: Update Analytics Revenue ---
+@receiver(pre_save, sender=Payment)
+def remember_payment_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = Payment.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
 
 
-# --- NEW: Update Analytics Revenue ---
 @receiver(post_save, sender=Payment)
 def update_revenue_on_payment(sender, instance, created, **kwargs):
-    if instance.status == 'success':
-        today = timezone.now().date()
-        row, _ = AnalyticsData.objects.get_or_create(date=today)
-        row.total_revenue = calculate_total_revenue()
-        row.save(update_fields=['total_revenue'])
\ No newline at end of file
+    if instance.status == 'success' and getattr(instance, '_previous_status', None) != 'success':
+        record_analytics_delta(total_revenue=instance.amount)
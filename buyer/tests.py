@@ -1,3 +1,115 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from farmer.models import ProductListing
+from utils.testing import create_listing, create_user, mute_analytics, retry_locked
+from .models import Purchase
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    """Many threads holding stock on one listing at once through ProductListing.reserve"""
+
+    THREADS = 8
+    RESERVES_PER_THREAD = 150
+    STOCK = 500
+
+    def setUp(self):
+        mute_analytics(self)
+        farmer = create_user('farmer', role='farmer')
+        self.buyers = [create_user(f'buyer{i}') for i in range(self.THREADS)]
+        # Bidding ended a day ago without bids, so the listing is open for regular purchase
+        self.listing = create_listing(
+            farmer, quantity=self.STOCK,
+            bid_start_time=timezone.now() - timedelta(days=2), bid_end_time=timezone.now() - timedelta(days=1),
+        )
+
+    def test_concurrent_reservations_never_oversell(self):
+        errors = []
+
+        def reserve_repeatedly(buyer):
+            try:
+                for i in range(self.RESERVES_PER_THREAD):
+                    try:
+                        retry_locked(lambda: ProductListing.objects.get(pk=self.listing.pk).reserve(buyer, 1 + i % 3))
+                    except ValidationError:
+                        continue
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=reserve_repeatedly, args=(buyer,)) for buyer in self.buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        pending = Purchase.objects.filter(listing=self.listing, purchase_type='regular', status='pending_payment')
+        held = sum(pending.values_list('quantity', flat=True))
+        # 1,200 requests for 2,400 units: every unit gets held, none twice
+        self.assertEqual(held, self.STOCK)
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.reserved_qty, held)
+        self.assertEqual(ProductListing.objects.with_stock().get(pk=self.listing.pk).available_quantity, 0)
+
+        pending_count = pending.count()
+        pending.update(reserved_until=timezone.now() - timedelta(minutes=1))
+        released = 0
+        while batch := ProductListing.objects.release_expired_reservations(batch_size=100):
+            released += batch
+        self.assertEqual(released, pending_count)
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.reserved_qty, 0)
+        self.assertEqual(ProductListing.objects.with_stock().get(pk=self.listing.pk).available_quantity, self.STOCK)
+
+
+class ReservationSweepTests(TestCase):
+    """release_expired_reservations against a buyer paying at the last moment"""
+
+    def setUp(self):
+        mute_analytics(self)
+        self.buyer = create_user('buyer')
+        self.listing = create_listing(
+            create_user('farmer', role='farmer'), quantity=20,
+            bid_start_time=timezone.now() - timedelta(days=2), bid_end_time=timezone.now() - timedelta(days=1),
+        )
+        self.purchase = self.listing.reserve(self.buyer, 5)
+        Purchase.objects.filter(pk=self.purchase.pk).update(reserved_until=timezone.now() - timedelta(minutes=1))
+        self.client.force_login(self.buyer)
+
+    def test_payment_landing_after_the_sweeper_selects_is_kept(self):
+        responses = []
+
+        def pay_before_first_update(execute, sql, params, many, context):
+            # The sweeper has read the lapsed hold; the buyer's payment commits before it cancels
+            if not responses and sql.startswith('UPDATE'):
+                responses.append(None)  # the view's own UPDATEs pass straight through
+                responses[0] = self.client.post(reverse('buyer:pay', args=[self.purchase.pk]))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(pay_before_first_update):
+            released = ProductListing.objects.release_expired_reservations()
+
+        self.assertRedirects(responses[0], reverse('buyer:success', args=[self.purchase.pk]), fetch_redirect_response=False)
+        self.assertEqual(released, 0)
+        self.purchase.refresh_from_db()
+        self.assertEqual(self.purchase.status, 'payment_completed')
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.reserved_qty, 0)
+        self.assertEqual(self.listing.sold_regular_qty, 5)
+        self.assertEqual(ProductListing.objects.with_stock().get(pk=self.listing.pk).available_quantity, 15)
+
+    def test_lapsed_hold_is_released(self):
+        self.assertEqual(ProductListing.objects.release_expired_reservations(), 1)
+        self.purchase.refresh_from_db()
+        self.assertEqual(self.purchase.status, 'cancelled')
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.reserved_qty, 0)
+        self.assertEqual(ProductListing.objects.with_stock().get(pk=self.listing.pk).available_quantity, 20)
@@ -1,5 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from utils.pagination import paginate_queryset  # make sure path is correct
 from django.contrib import messages
 from django.core.paginator import Paginator
@@ -8,6 +10,7 @@ from adminpanel.models import StorageSlot, SubsidyScheme
 from farmer.models import ProductListing, Bid, StorageBooking
 from .models import Purchase
 from .forms import BidForm, PurchaseForm, StorageBookingForm
+from notifications.broadcasts import deliver_broadcasts
 
 def buyer_required(view_func):
     def wrapper(request, *args, **kwargs):
@@ -20,6 +23,8 @@ def buyer_required(view_func):
 @login_required
 @buyer_required
 def dashboard(request):
+    # Pick up admin broadcasts here so the navbar badge includes them
+    deliver_broadcasts(request.user)
     now = timezone.now()
 
     total_purchases = Purchase.objects.filter(buyer=request.user).count()
@@ -48,23 +53,13 @@ def profile(request):
 @login_required
 @buyer_required
 def marketplace_buy(request):
-    now = timezone.now()
-    
-    # Get all active listings
-    listings = ProductListing.objects.filter(is_active=True).order_by('-created_at')
-    
-    # Split listings into bidding and direct purchase
-    bidding_listings = []
-    direct_purchase_listings = []
+    listings = ProductListing.objects.with_stock().select_related('current_high_bid').order_by('-created_at')
     
-    for listing in listings:
-        if listing.is_bidding_open:
-            bidding_listings.append(listing)
-        elif listing.is_available_for_regular_purchase:
-            direct_purchase_listings.append(listing)
-
+    # Split listings into bidding and direct purchase in the database
+    bidding_listings = listings.open_for_bidding()
+    direct_purchase_listings = listings.open_for_regular_purchase()
     
-    # Paginate both lists
+    # Paginate both querysets so only the visible rows are fetched
     bidding_page_obj, bidding_listings = paginate_queryset(request, bidding_listings)
     direct_page_obj, direct_purchase_listings = paginate_queryset(request, direct_purchase_listings)
     
@@ -91,15 +86,15 @@ from .forms import BidForm, PurchaseForm, StorageBookingForm
 
 @login_required
 def product_detail(request, listing_id):
-    listing = get_object_or_404(ProductListing, id=listing_id)
-    bids = Bid.objects.filter(listing=listing).order_by('-amount')
+    listing = get_object_or_404(ProductListing.objects.with_stock(), id=listing_id)
+    bids = Bid.objects.filter(listing=listing).select_related('bidder').order_by('-amount', 'placed_at')
     winner_bid = listing.winning_bid
     is_winner = bool(winner_bid and request.user == winner_bid.bidder)
     
     # KEY FIX: Allow winner to pay AFTER bidding ends, within 6-hour window
     show_winner_pay_cta = bool(
         is_winner and 
-        (listing.is_bidding_open or listing.is_within_bid_payment_window) and
+        (listing.is_bidding_open() or listing.is_within_bid_payment_window()) and
         winner_bid.payment_status == 'pending'
     )
 
@@ -137,18 +132,14 @@ def product_detail(request, listing_id):
         if request.method == 'POST' and 'purchase_submit' in request.POST:
             purchase_form = PurchaseForm(request.POST, listing=listing)
             if purchase_form.is_valid():
-                quantity = purchase_form.cleaned_data['quantity']
-                purchase = Purchase.objects.create(
-                    buyer=request.user,
-                    listing=listing,
-                    purchase_type='regular',
-                    quantity=quantity,
-                    unit_price=listing.price,
-                    total_price=listing.price * quantity,
-                    status='pending_payment'
-                )
-                messages.success(request, 'Proceed to payment to confirm your order.')
-                return redirect('buyer:pay', purchase_id=purchase.id)
+                try:
+                    purchase = listing.reserve(request.user, purchase_form.cleaned_data['quantity'])
+                except ValidationError as e:
+                    purchase_form.add_error('quantity', e)
+                    messages.error(request, 'Please correct the errors below.')
+                else:
+                    messages.success(request, 'Stock reserved. Complete payment to confirm your order.')
+                    return redirect('buyer:pay', purchase_id=purchase.id)
             else:
                 messages.error(request, 'Please correct the errors below.')
         else:
@@ -176,7 +167,7 @@ def product_detail(request, listing_id):
 
 @login_required
 def place_bid(request, listing_id):
-    listing = get_object_or_404(ProductListing, id=listing_id, is_active=True)
+    listing = get_object_or_404(ProductListing.objects.with_stock(), id=listing_id, is_active=True)
     if not listing.is_bidding_open():
         messages.error(request, "Bidding for this listing has ended.")
         return redirect('buyer:product_detail', listing_id=listing.id)
@@ -184,12 +175,14 @@ def place_bid(request, listing_id):
     if request.method == 'POST':
         form = BidForm(request.POST, listing=listing)
         if form.is_valid():
-            bid = form.save(commit=False)
-            bid.bidder = request.user
-            bid.quantity = listing.available_quantity  # snapshot the available stock at time of bid
-            bid.save()
-            messages.success(request, 'Bid placed successfully!')
-            return redirect('buyer:product_detail', listing_id=listing.id)
+            try:
+                listing.place_bid(request.user, form.cleaned_data['amount'])
+            except ValidationError as e:
+                form.add_error('amount', e)
+                messages.error(request, 'Your bid was not accepted.')
+            else:
+                messages.success(request, 'Bid placed successfully!')
+                return redirect('buyer:product_detail', listing_id=listing.id)
         else:
             messages.error(request, 'There was an error with your bid.')
     else:
@@ -202,20 +195,17 @@ def place_bid(request, listing_id):
 @login_required
 @buyer_required
 def purchase_product(request, listing_id):
-    listing = get_object_or_404(ProductListing, id=listing_id, is_active=True)
+    listing = get_object_or_404(ProductListing.objects.with_stock(), id=listing_id, is_active=True)
     if request.method == 'POST':
         form = PurchaseForm(request.POST, listing=listing)
         if form.is_valid():
-            purchase = form.save(commit=False)
-            purchase.buyer = request.user
-            purchase.save()
-            # Update listing quantity
-            listing.quantity -= purchase.quantity
-            if listing.quantity <= 0:
-                listing.is_active = False
-            listing.save()
-            messages.success(request, 'Purchase confirmed!')
-            return redirect('buyer:my_purchases')
+            try:
+                purchase = listing.reserve(request.user, form.cleaned_data['quantity'])
+            except ValidationError as e:
+                form.add_error('quantity', e)
+            else:
+                messages.success(request, 'Stock reserved. Complete payment to confirm your order.')
+                return redirect('buyer:pay', purchase_id=purchase.id)
     else:
         form = PurchaseForm(listing=listing)
     return render(request, 'buyer/purchase_product.html', {'form': form, 'listing': listing})
@@ -345,6 +335,11 @@ def pay(request, purchase_id):
     # Already paid
     if purchase.status == 'payment_completed' and purchase.payment and purchase.payment.status == 'success':
         return redirect('buyer:success', purchase_id=purchase.id)
+
+    # Lapsed bid wins are cancelled by the expire_unpaid_bids sweeper
+    if purchase.status == 'cancelled':
+        messages.error(request, 'This order was cancelled because the payment deadline passed.')
+        return redirect('buyer:product_detail', listing_id=purchase.listing_id)
     
     # Initialize payment if not exists
     if not purchase.payment:
@@ -359,19 +354,29 @@ def pay(request, purchase_id):
         purchase.save(update_fields=['payment'])
     
     if request.method == 'POST':
-        # Mark payment successful
-        purchase.payment.mark_success()
-        
-        # Update purchase status
-        purchase.status = 'payment_completed'
-        purchase.save(update_fields=['status'])
-        
-        # KEY FIX: Update bid status if this is a bid purchase
-        if purchase.purchase_type == 'bid' and purchase.related_bid:
-            bid = purchase.related_bid
-            bid.payment_status = 'completed'
-            bid.is_accepted = True
-            bid.save(update_fields=['payment_status', 'is_accepted'])
+        with transaction.atomic():
+            # Claim the purchase; loses to the reservation sweeper if the hold already lapsed
+            claimable = Purchase.objects.filter(pk=purchase.pk, status='pending_payment')
+            if purchase.purchase_type == 'bid':
+                # A lapsed win belongs to the expire_unpaid_bids sweeper, even before it gets to it
+                claimable = claimable.exclude(listing__payment_due_at__lt=timezone.now())
+            claimed = claimable.update(status='payment_completed')
+            if not claimed:
+                messages.error(request, 'This order is no longer awaiting payment.')
+                return redirect('buyer:product_detail', listing_id=purchase.listing_id)
+            purchase.status = 'payment_completed'
+
+            # Mark payment successful
+            purchase.payment.mark_success()
+            
+            # KEY FIX: Update bid status if this is a bid purchase
+            if purchase.purchase_type == 'bid' and purchase.related_bid:
+                bid = purchase.related_bid
+                bid.payment_status = 'completed'
+                bid.is_accepted = True
+                bid.save(update_fields=['payment_status', 'is_accepted'])
+
+            purchase.listing.record_payment(purchase)
         
         messages.success(request, 'Payment successful!')
         return redirect('buyer:success', purchase_id=purchase.id)
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from farmer.models import ProductListing
+
+
+class Command(BaseCommand):
+    help = 'Close expired auctions in batches: accept winning bids, open their purchases and deactivate the listings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for expired auctions.')
+        parser.add_argument('--interval', type=float, default=30, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            closed = self.close_all(options['batch_size'])
+            if closed:
+                self.stdout.write(self.style.SUCCESS(f'Closed {closed} auction(s).'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def close_all(self, batch_size):
+        closed = 0
+        while True:
+            batch = ProductListing.objects.close_expired_auctions(batch_size=batch_size)
+            closed += len(batch)
+            if len(batch) < batch_size:
+                return closed
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from farmer.models import ProductListing
+
+
+class Command(BaseCommand):
+    help = 'Cancel winning bids that were not paid within the payment window and release their locked stock.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for lapsed wins.')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            released = self.release_all(options['batch_size'])
+            if released:
+                self.stdout.write(self.style.SUCCESS(f'Released {released} unpaid win(s).'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def release_all(self, batch_size):
+        released = 0
+        while True:
+            batch = ProductListing.objects.expire_unpaid_wins(batch_size=batch_size)
+            released += len(batch)
+            # Wins paid during the sweep are skipped, so a short batch is not the last one
+            if not batch:
+                return released
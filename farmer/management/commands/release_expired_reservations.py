@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from farmer.models import ProductListing
+
+
+class Command(BaseCommand):
+    help = 'Cancel unpaid regular purchases whose stock hold has expired and return the stock to their listings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for expired holds.')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            released = 0
+            while True:
+                count = ProductListing.objects.release_expired_reservations(batch_size=batch_size)
+                released += count
+                if count < batch_size:
+                    break
+            if released:
+                self.stdout.write(self.style.SUCCESS(f'Released {released} expired reservation(s).'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from farmer.models import ProductListing
+
+
+class Command(BaseCommand):
+    help = 'Recompute ProductListing stock and revenue counters from Purchase and Bid rows and repair any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listing', type=int, action='append', dest='listing_ids',
+                            help='Only repair the given listing id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        listings = ProductListing.objects.order_by('pk')
+        if options['listing_ids']:
+            listings = listings.filter(pk__in=options['listing_ids'])
+
+        drifted = listings.sync_counters(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters on {drifted} listing(s).'))
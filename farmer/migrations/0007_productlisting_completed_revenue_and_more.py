@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0006_remove_productlisting_lat_remove_productlisting_long_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productlisting',
+            name='completed_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='current_high_bid',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='farmer.bid'),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='locked_qty',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='sold_bid_qty',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='sold_regular_qty',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
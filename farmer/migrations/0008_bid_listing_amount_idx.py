@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0007_productlisting_completed_revenue_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['listing', '-amount', 'placed_at'], name='bid_listing_amount_idx'),
+        ),
+    ]
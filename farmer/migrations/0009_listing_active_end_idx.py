@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0008_bid_listing_amount_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productlisting',
+            index=models.Index(fields=['is_active', 'bid_end_time'], name='listing_active_end_idx'),
+        ),
+    ]
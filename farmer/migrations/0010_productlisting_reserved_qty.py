@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0009_listing_active_end_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productlisting',
+            name='reserved_qty',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
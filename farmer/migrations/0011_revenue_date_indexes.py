@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0003_remove_cultivationslot_lat_and_more'),
+        ('farmer', '0010_productlisting_reserved_qty'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['is_accepted', 'payment_status', 'placed_at'], name='bid_paid_placed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cultivationbooking',
+            index=models.Index(fields=['status', 'booked_at'], name='cultivation_status_booked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storagebooking',
+            index=models.Index(fields=['status', 'booked_at'], name='storage_status_booked_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+# Payment window in force when these counters were introduced
+PAYMENT_WINDOW = timedelta(hours=6)
+
+COUNTER_FIELDS = [
+    'sold_regular_qty', 'sold_bid_qty', 'locked_qty', 'reserved_qty', 'current_high_bid', 'completed_revenue',
+]
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    The counter columns were added in 0007 and 0010 with zero defaults, so on an
+    existing database every listing read as unsold and unlocked. Recompute them
+    from Bid and Purchase rows, spelled out against the historical models so the
+    step keeps working as the live models change.
+    """
+    ProductListing = apps.get_model('farmer', 'ProductListing')
+    Bid = apps.get_model('farmer', 'Bid')
+    Purchase = apps.get_model('buyer', 'Purchase')
+    money = models.DecimalField(max_digits=12, decimal_places=2)
+    now = timezone.now()
+
+    def total(queryset, field, output_field):
+        return Coalesce(
+            Subquery(queryset.values('listing').annotate(total=models.Sum(field)).values('total')),
+            Value(0),
+            output_field=output_field,
+        )
+
+    quantity = models.IntegerField()
+
+    purchases = Purchase.objects.filter(listing=OuterRef('pk'), purchase_type='regular')
+    top_bid = Bid.objects.filter(listing=OuterRef('pk')).order_by('-amount', 'placed_at')
+    bidding_open = Q(bid_start_time__lte=now) & (Q(bid_end_time__isnull=True) | Q(bid_end_time__gte=now))
+    in_payment_window = Q(bid_end_time__isnull=False, bid_end_time__gte=now - PAYMENT_WINDOW)
+    top_bid_settled = Q(top_status='completed') | Q(top_accepted=True)
+
+    listings = ProductListing.objects.annotate(
+        top_id=Subquery(top_bid.values('pk')[:1]),
+        top_quantity=Subquery(top_bid.values('quantity')[:1]),
+        top_status=Subquery(top_bid.values('payment_status')[:1]),
+        top_accepted=Subquery(top_bid.values('is_accepted')[:1]),
+        top_total=Subquery(top_bid.annotate(total=F('amount') * F('quantity')).values('total')[:1], output_field=money),
+        new_sold_regular=total(purchases.filter(status='payment_completed'), 'quantity', quantity),
+        new_sold_bid=total(
+            Bid.objects.filter(listing=OuterRef('pk'), is_accepted=True, payment_status='completed'),
+            'quantity', quantity,
+        ),
+        new_reserved=total(purchases.filter(status='pending_payment', reserved_until__isnull=False), 'quantity', quantity),
+        regular_revenue=total(purchases.filter(status='payment_completed'), 'total_price', money),
+    ).annotate(
+        new_locked=Case(
+            When(top_quantity__isnull=True, then=Value(0)),
+            When(bidding_open | in_payment_window | top_bid_settled, then=Least('top_quantity', 'quantity')),
+            default=Value(0),
+            output_field=quantity,
+        ),
+        bid_revenue=Case(
+            When(bid_end_time__lt=now, top_status='completed', then=Coalesce('top_total', Value(0), output_field=money)),
+            default=Value(0),
+            output_field=money,
+        ),
+    )
+
+    batch = []
+    for listing in listings.iterator(chunk_size=500):
+        listing.sold_regular_qty = listing.new_sold_regular
+        listing.sold_bid_qty = listing.new_sold_bid
+        listing.locked_qty = listing.new_locked
+        listing.reserved_qty = listing.new_reserved
+        listing.current_high_bid_id = listing.top_id
+        listing.completed_revenue = listing.bid_revenue + listing.regular_revenue
+        batch.append(listing)
+        if len(batch) >= 500:
+            ProductListing.objects.bulk_update(batch, COUNTER_FIELDS)
+            batch = []
+    ProductListing.objects.bulk_update(batch, COUNTER_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buyer', '0006_revenue_date_indexes'),
+        ('farmer', '0011_revenue_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
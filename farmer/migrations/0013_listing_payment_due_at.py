@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:24
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+PAYMENT_WINDOW = timedelta(hours=6)
+
+
+def backfill_payment_due_at(apps, schema_editor):
+    # Closed auctions still waiting on their winner: the window ran from the
+    # bid Purchase that close_expired_auctions opened
+    ProductListing = apps.get_model('farmer', 'ProductListing')
+    Purchase = apps.get_model('buyer', 'Purchase')
+    opened = Purchase.objects.filter(
+        listing=OuterRef('pk'),
+        related_bid=OuterRef('current_high_bid'),
+        purchase_type='bid',
+        status='pending_payment',
+    ).order_by('purchase_date')
+    waiting = ProductListing.objects.filter(
+        is_active=False, locked_qty__gt=0, current_high_bid__payment_status='pending',
+    ).annotate(opened_at=Subquery(opened.values('purchase_date')[:1])).exclude(opened_at=None)
+    for listing in waiting:
+        listing.payment_due_at = listing.opened_at + PAYMENT_WINDOW
+    ProductListing.objects.bulk_update(waiting, ['payment_due_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buyer', '0006_revenue_date_indexes'),
+        ('farmer', '0012_backfill_listing_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productlisting',
+            name='payment_due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bid',
+            name='payment_status',
+            field=models.CharField(choices=[('pending', 'Pending Payment'), ('completed', 'Payment Completed'), ('expired', 'Payment Window Expired')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(backfill_payment_due_at, migrations.RunPython.noop),
+    ]
@@ -25,6 +25,9 @@ class CultivationBooking(models.Model):
         constraints = [
             models.CheckConstraint(check=models.Q(start_date__lte=models.F('end_date')), name='cultivation_valid_dates'),
         ]
+        indexes = [
+            models.Index(fields=['status', 'booked_at'], name='cultivation_status_booked_idx'),
+        ]
 
 class StorageBooking(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, limit_choices_to={'role': 'farmer'})
@@ -44,6 +47,9 @@ class StorageBooking(models.Model):
         constraints = [
             models.CheckConstraint(check=models.Q(start_date__lte=models.F('end_date')), name='storage_valid_dates'),
         ]
+        indexes = [
+            models.Index(fields=['status', 'booked_at'], name='storage_status_booked_idx'),
+        ]
 
 
 
@@ -52,11 +58,374 @@ from django.utils import timezone
 from django.core.validators import MinValueValidator
 from accounts.models import CustomUser
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from accounts.models import CustomUser
 
+# How long an auction winner has to pay before the win lapses
+PAYMENT_WINDOW = timezone.timedelta(hours=6)
+
+# How long a pending regular purchase holds its stock before the sweeper releases it
+RESERVATION_HOLD = timezone.timedelta(minutes=15)
+
+COUNTER_FIELDS = [
+    'sold_regular_qty', 'sold_bid_qty', 'locked_qty', 'reserved_qty', 'current_high_bid', 'completed_revenue',
+]
+
+
+def _bidding_open_q(now):
+    return Q(bid_start_time__lte=now) & (Q(bid_end_time__isnull=True) | Q(bid_end_time__gte=now))
+
+
+def _free_stock(prefix):
+    """Stock not sold, locked by a bid or held by a reservation"""
+    return (
+        F('quantity') - F(f'{prefix}_sold_regular') - F(f'{prefix}_sold_bid')
+        - F(f'{prefix}_locked') - F(f'{prefix}_reserved')
+    )
+
+
+def _top_bid_subquery():
+    return Bid.objects.filter(listing=OuterRef('pk')).exclude(payment_status='expired').order_by('-amount', 'placed_at')
+
+
+class ProductListingQuerySet(models.QuerySet):
+    def open_for_bidding(self):
+        """Active listings whose bidding window is open right now"""
+        return self.filter(_bidding_open_q(timezone.now()), is_active=True)
+
+    def open_for_regular_purchase(self):
+        """Active listings outside their bidding window that still have stock; needs with_stock()"""
+        return self.filter(is_active=True, stock_available__gt=0).exclude(_bidding_open_q(timezone.now()))
+
+    def expired_auctions(self):
+        """
+        Active listings whose bidding window has ended with at least one live
+        bid. Listings nobody bid on, or whose bidders all let their win lapse,
+        stay active for direct purchase.
+        """
+        return self.filter(
+            Exists(Bid.objects.filter(listing=OuterRef('pk')).exclude(payment_status='expired')),
+            is_active=True,
+            bid_end_time__lt=timezone.now(),
+        )
+
+    def close_expired_auctions(self, batch_size=200):
+        """
+        Close one batch of expired auctions: accept each top bid, open a pending
+        bid Purchase for the winner and deactivate the listings, all in one
+        transaction. Returns the listings that were closed.
+        """
+        from analytics.events import record_analytics_delta
+        from buyer.models import Purchase
+        from notifications.broadcasts import bulk_notify
+        from notifications.models import Notification
+        from notifications.outbox import queue_mass_email
+
+        with transaction.atomic():
+            batch = list(
+                self.expired_auctions()
+                .select_for_update(skip_locked=True)
+                .annotate(top_bid_id=Subquery(_top_bid_subquery().values('pk')[:1]))
+                .order_by('bid_end_time')[:batch_size]
+            )
+            if not batch:
+                return []
+            listing_ids = [listing.pk for listing in batch]
+
+            winners = list(
+                Bid.objects
+                .filter(pk__in=[listing.top_bid_id for listing in batch if listing.top_bid_id])
+                .select_related('bidder', 'listing')
+            )
+            Bid.objects.filter(pk__in=[bid.pk for bid in winners]).update(is_accepted=True)
+
+            already_opened = set(
+                Purchase.objects.filter(related_bid__in=winners).values_list('related_bid_id', flat=True)
+            )
+            Purchase.objects.bulk_create([
+                Purchase(
+                    buyer=bid.bidder,
+                    listing=bid.listing,
+                    purchase_type='bid',
+                    related_bid=bid,
+                    quantity=bid.quantity,
+                    unit_price=bid.amount,
+                    total_price=bid.total_amount,
+                    status='pending_payment',
+                )
+                for bid in winners if bid.pk not in already_opened
+            ], batch_size=batch_size)
+            bulk_notify([
+                Notification(
+                    user=bid.bidder,
+                    title='Bid Accepted',
+                    message=f'Your bid on {bid.listing.name} has been accepted.',
+                    notification_type='marketplace',
+                )
+                for bid in winners
+            ], batch_size=batch_size)
+
+            ProductListing.objects.filter(pk__in=listing_ids).update(
+                is_active=False, payment_due_at=timezone.now() + PAYMENT_WINDOW,
+            )
+            ProductListing.objects.filter(pk__in=listing_ids).sync_counters(batch_size=batch_size)
+            record_analytics_delta(active_listings=-len(batch))
+
+            queue_mass_email([
+                (
+                    'Purchase Initiated',
+                    f'Your winning bid on {bid.listing.name} was accepted. Complete payment to confirm.',
+                    settings.DEFAULT_FROM_EMAIL,
+                    [bid.bidder.email],
+                )
+                for bid in winners
+            ])
+        return batch
+
+    def expire_unpaid_wins(self, batch_size=200):
+        """
+        Release one batch of closed auctions whose winner missed payment_due_at:
+        cancel the pending bid purchases, mark the winning bids expired and put
+        the listings back on sale. The next close_expired_auctions run offers
+        each one to its next-highest bidder; with none left it stays open for
+        direct purchase. A win paid while the sweep runs is left alone.
+        Returns the listings that were released.
+        """
+        from analytics.events import record_analytics_delta
+        from buyer.models import Purchase
+        from notifications.broadcasts import bulk_notify
+        from notifications.models import Notification
+
+        with transaction.atomic():
+            batch = list(
+                self.filter(
+                    is_active=False,
+                    payment_due_at__lt=timezone.now(),
+                    locked_qty__gt=0,
+                    current_high_bid__payment_status='pending',
+                )
+                .select_for_update(of=('self',), skip_locked=True)
+                .select_related('current_high_bid')
+                .order_by('bid_end_time')[:batch_size]
+            )
+            if not batch:
+                return []
+            # Release row by row and only while the bid is still unpaid: the pay view
+            # may have claimed the purchase since the SELECT (select_for_update is a
+            # no-op on SQLite), and a paid win must keep its listing closed
+            released = []
+            for listing in batch:
+                bid = listing.current_high_bid
+                Purchase.objects.filter(
+                    listing_id=listing.pk,
+                    related_bid=bid,
+                    purchase_type='bid',
+                    status='pending_payment',
+                ).update(status='cancelled')
+                if Bid.objects.filter(pk=bid.pk, payment_status='pending').update(
+                    is_accepted=False, payment_status='expired',
+                ):
+                    released.append(listing)
+            if not released:
+                return []
+            listing_ids = [listing.pk for listing in released]
+
+            ProductListing.objects.filter(pk__in=listing_ids).update(is_active=True, payment_due_at=None)
+            # Moves current_high_bid to the next live bid and recomputes locked_qty
+            ProductListing.objects.filter(pk__in=listing_ids).sync_counters(batch_size=batch_size)
+            record_analytics_delta(active_listings=len(released))
+
+            bulk_notify([
+                Notification(
+                    user_id=listing.current_high_bid.bidder_id,
+                    title='Payment Window Expired',
+                    message=f'Your winning bid on {listing.name} was cancelled because payment was not completed in time.',
+                    notification_type='marketplace',
+                )
+                for listing in released
+            ], batch_size=batch_size)
+        return released
+
+    def release_expired_reservations(self, batch_size=500):
+        """
+        Cancel one batch of regular purchases whose stock hold ran out unpaid
+        and give the quantity back. Returns how many purchases were released.
+        """
+        from buyer.models import Purchase
+        with transaction.atomic():
+            expired = list(
+                Purchase.objects
+                .filter(listing__in=self, purchase_type='regular', status='pending_payment',
+                        reserved_until__lt=timezone.now())
+                .select_for_update(skip_locked=True)
+                .values_list('pk', 'listing_id', 'quantity')[:batch_size]
+            )
+            if not expired:
+                return 0
+
+            # Cancel row by row and only while still pending: select_for_update is a
+            # no-op on SQLite, so a payment may have landed since the SELECT, and its
+            # quantity has already left reserved_qty through record_payment
+            released = {}
+            cancelled = 0
+            for pk, listing_id, quantity in expired:
+                if Purchase.objects.filter(pk=pk, status='pending_payment').update(status='cancelled'):
+                    cancelled += 1
+                    released[listing_id] = released.get(listing_id, 0) + quantity
+            for listing_id, quantity in released.items():
+                ProductListing.objects.filter(pk=listing_id).update(
+                    reserved_qty=Greatest(F('reserved_qty') - quantity, Value(0)),
+                )
+        return cancelled
+
+    def with_stock(self):
+        """
+        Annotate locked, sold and available quantity from the persisted counter columns.
+        Use with_live_stock() to recompute them from Purchase and Bid rows instead.
+        """
+        return self.annotate(
+            stock_locked=Least('locked_qty', 'quantity'),
+            stock_sold_regular=F('sold_regular_qty'),
+            stock_sold_bid=F('sold_bid_qty'),
+            stock_reserved=F('reserved_qty'),
+        ).annotate(
+            stock_available=Greatest(_free_stock('stock'), Value(0)),
+        )
+
+    def with_live_stock(self):
+        """
+        Annotate locked, sold and available quantity for every listing in one query.
+        Mirrors ProductListing.available_quantity so the properties can reuse the values.
+        """
+        from buyer.models import Purchase
+        now = timezone.now()
+
+        top_bid = _top_bid_subquery()
+        sold_regular = (
+            Purchase.objects
+            .filter(listing=OuterRef('pk'), purchase_type='regular', status='payment_completed')
+            .values('listing')
+            .annotate(total=models.Sum('quantity'))
+            .values('total')
+        )
+        sold_bid = (
+            Bid.objects
+            .filter(listing=OuterRef('pk'), is_accepted=True, payment_status='completed')
+            .values('listing')
+            .annotate(total=models.Sum('quantity'))
+            .values('total')
+        )
+        # A hold lasts until the purchase is paid or the sweeper cancels it
+        reserved = (
+            Purchase.objects
+            .filter(listing=OuterRef('pk'), purchase_type='regular', status='pending_payment',
+                    reserved_until__isnull=False)
+            .values('listing')
+            .annotate(total=models.Sum('quantity'))
+            .values('total')
+        )
+
+        bidding_open = _bidding_open_q(now)
+        # Awaiting close, or closed and the winner still has time to pay
+        in_payment_window = (
+            Q(payment_due_at__isnull=True, is_active=True, bid_end_time__lt=now)
+            | Q(payment_due_at__gte=now)
+        )
+        top_bid_settled = Q(stock_top_bid_status='completed') | Q(stock_top_bid_accepted=True)
+
+        return self.annotate(
+            stock_top_bid_id=Subquery(top_bid.values('pk')[:1]),
+            stock_top_bid_quantity=Subquery(top_bid.values('quantity')[:1]),
+            stock_top_bid_status=Subquery(top_bid.values('payment_status')[:1]),
+            stock_top_bid_accepted=Subquery(top_bid.values('is_accepted')[:1]),
+            stock_sold_regular=Coalesce(Subquery(sold_regular), 0),
+            stock_sold_bid=Coalesce(Subquery(sold_bid), 0),
+            stock_reserved=Coalesce(Subquery(reserved), 0),
+        ).annotate(
+            stock_locked=Case(
+                When(stock_top_bid_quantity__isnull=True, then=Value(0)),
+                When(bidding_open | in_payment_window | top_bid_settled,
+                     then=Least('stock_top_bid_quantity', 'quantity')),
+                default=Value(0),
+                output_field=models.IntegerField(),
+            ),
+        ).annotate(
+            stock_available=Greatest(_free_stock('stock'), Value(0)),
+        )
+
+    def with_revenue(self):
+        """
+        Annotate completed bid, regular and total revenue per listing.
+        Mirrors ProductListing.bid_revenue / regular_sales_revenue / total_revenue.
+        """
+        from buyer.models import Purchase
+        money = models.DecimalField(max_digits=12, decimal_places=2)
+
+        top_bid = _top_bid_subquery()
+        regular = (
+            Purchase.objects
+            .filter(listing=OuterRef('pk'), purchase_type='regular', status='payment_completed')
+            .values('listing')
+            .annotate(total=models.Sum('total_price'))
+            .values('total')
+        )
+
+        return self.annotate(
+            revenue_top_bid_status=Subquery(top_bid.values('payment_status')[:1]),
+            revenue_top_bid_total=Subquery(
+                top_bid.annotate(total=F('amount') * F('quantity')).values('total')[:1],
+                output_field=money,
+            ),
+        ).annotate(
+            revenue_bid=Case(
+                When(bid_end_time__lt=timezone.now(), revenue_top_bid_status='completed',
+                     then=Coalesce('revenue_top_bid_total', Value(0), output_field=money)),
+                default=Value(0),
+                output_field=money,
+            ),
+            revenue_regular=Coalesce(Subquery(regular), Value(0), output_field=money),
+        ).annotate(
+            revenue_total=F('revenue_bid') + F('revenue_regular'),
+        )
+
+    def revenue_totals(self):
+        """Sum completed bid and regular revenue over the queryset in one query"""
+        totals = self.with_revenue().aggregate(
+            bid=models.Sum('revenue_bid'),
+            regular=models.Sum('revenue_regular'),
+        )
+        bid = totals['bid'] or 0
+        regular = totals['regular'] or 0
+        return {'bid': bid, 'regular': regular, 'total': bid + regular}
+
+    def sync_counters(self, batch_size=500):
+        """Recompute the counter columns from Purchase and Bid rows; returns how many listings drifted"""
+        drifted = []
+        for listing in self.with_live_stock().with_revenue().iterator(chunk_size=batch_size):
+            expected = {
+                'sold_regular_qty': listing.stock_sold_regular,
+                'sold_bid_qty': listing.stock_sold_bid,
+                'locked_qty': listing.stock_locked,
+                'reserved_qty': listing.stock_reserved,
+                'current_high_bid_id': listing.stock_top_bid_id,
+                'completed_revenue': listing.revenue_total,
+            }
+            if any(getattr(listing, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(listing, field, value)
+                drifted.append(listing)
+
+        with transaction.atomic():
+            ProductListing.objects.bulk_update(drifted, COUNTER_FIELDS, batch_size=batch_size)
+        return len(drifted)
+
+
 class ProductListing(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, limit_choices_to={'role': 'farmer'})
     name = models.CharField(max_length=100)
@@ -70,7 +439,36 @@ class ProductListing(models.Model):
     bid_end_time = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    # Denormalized counters, kept in step by place_bid / record_payment and
+    # repaired from the source tables by the sync_listing_counters command.
+    sold_regular_qty = models.PositiveIntegerField(default=0)
+    sold_bid_qty = models.PositiveIntegerField(default=0)
+    locked_qty = models.PositiveIntegerField(default=0)
+    reserved_qty = models.PositiveIntegerField(default=0)
+    current_high_bid = models.ForeignKey('Bid', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    completed_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Set when close_expired_auctions closes the auction; the winner must pay by then
+    payment_due_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ProductListingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The auction-close worker scans active listings by end time
+            models.Index(fields=['is_active', 'bid_end_time'], name='listing_active_end_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The counters and payment_due_at only move through update(); a full save
+        # of an instance loaded earlier in the request must not write stale copies back
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS + ['payment_due_at']
+            ]
+        super().save(*args, **kwargs)
+
     def is_bidding_open(self):
         now = timezone.now()
         return self.bid_start_time <= now and (not self.bid_end_time or now <= self.bid_end_time)
@@ -80,17 +478,29 @@ class ProductListing(models.Model):
         return bool(self.bid_end_time and now > self.bid_end_time)
     
     def payment_deadline(self):
-        if not self.bid_end_time:
-            return None
-        return self.bid_end_time + timezone.timedelta(hours=6)
-    
+        """When the winner's payment window ends; None until the auction is closed"""
+        return self.payment_due_at
+
     def is_within_bid_payment_window(self):
-        dl = self.payment_deadline()
-        return bool(dl and timezone.now() <= dl)
+        if self.payment_due_at:
+            return timezone.now() <= self.payment_due_at
+        # Ended but not closed yet: the window has not started
+        return self.is_active and self.has_bidding_ended()
     
     @property
     def highest_bid(self):
-        return self.bids.order_by('-amount').first()
+        """Top bid, resolved once per instance so a request only looks it up once"""
+        if '_highest_bid' not in self.__dict__:
+            if ProductListing.current_high_bid.is_cached(self):
+                # Loaded through select_related('current_high_bid')
+                self._highest_bid = self.current_high_bid
+            else:
+                self._highest_bid = self.bids.exclude(payment_status='expired').order_by('-amount', 'placed_at').first()
+        return self._highest_bid
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop('_highest_bid', None)
+        super().refresh_from_db(*args, **kwargs)
     
     @property
     def winning_bid_candidate(self):
@@ -114,6 +524,8 @@ class ProductListing(models.Model):
     @property
     def locked_bid_quantity(self):
         """Lock the highest bid quantity while bidding is open or within 6-hour winner window"""
+        if hasattr(self, 'stock_locked'):
+            return self.stock_locked
         hb = self.highest_bid
         if not hb:
             return 0
@@ -131,6 +543,8 @@ class ProductListing(models.Model):
     @property
     def sold_regular_quantity(self):
         """Count only completed regular purchases"""
+        if hasattr(self, 'stock_sold_regular'):
+            return self.stock_sold_regular
         from buyer.models import Purchase
         return Purchase.objects.filter(
             listing=self,
@@ -141,17 +555,34 @@ class ProductListing(models.Model):
     @property
     def sold_bid_quantity(self):
         """Count only completed bid payments"""
+        if hasattr(self, 'stock_sold_bid'):
+            return self.stock_sold_bid
         return self.bids.filter(
             is_accepted=True,
             payment_status='completed'
         ).aggregate(total=models.Sum('quantity'))['total'] or 0
     
+    @property
+    def reserved_quantity(self):
+        """Quantity held by unpaid regular purchases"""
+        if hasattr(self, 'stock_reserved'):
+            return self.stock_reserved
+        from buyer.models import Purchase
+        return Purchase.objects.filter(
+            listing=self,
+            purchase_type='regular',
+            status='pending_payment',
+            reserved_until__isnull=False,
+        ).aggregate(total=models.Sum('quantity'))['total'] or 0
+
     @property
     def available_quantity(self):
-        """Available for regular purchase = Total - Sold - Locked bid qty"""
+        """Available for regular purchase = Total - Sold - Locked bid qty - Reserved"""
+        if hasattr(self, 'stock_available'):
+            return self.stock_available
         locked = self.locked_bid_quantity
         sold = self.sold_regular_quantity + self.sold_bid_quantity
-        return max(self.quantity - sold - locked, 0)
+        return max(self.quantity - sold - locked - self.reserved_quantity, 0)
     
     @property
     def is_available_for_regular_purchase(self):
@@ -163,6 +594,8 @@ class ProductListing(models.Model):
     @property
     def bid_revenue(self):
         """Include only completed winning bid revenue"""
+        if hasattr(self, 'revenue_bid'):
+            return self.revenue_bid
         wb = self.winning_bid_candidate  # Use candidate, not winning_bid
         if wb and wb.payment_status == 'completed':
             total_amount = getattr(wb, 'total_amount', None)
@@ -174,6 +607,8 @@ class ProductListing(models.Model):
     @property
     def regular_sales_revenue(self):
         """Include only completed regular purchases"""
+        if hasattr(self, 'revenue_regular'):
+            return self.revenue_regular
         from buyer.models import Purchase
         return Purchase.objects.filter(
             listing=self,
@@ -184,8 +619,93 @@ class ProductListing(models.Model):
     @property
     def total_revenue(self):
         """Total completed revenue only"""
+        if hasattr(self, 'revenue_total'):
+            return self.revenue_total
         return (self.bid_revenue or 0) + (self.regular_sales_revenue or 0)
     
+    def place_bid(self, bidder, amount):
+        """
+        Accept or reject a bid atomically. current_high_bid acts as a version
+        column: the bid is only kept if no other bid replaced it since we read
+        it, so concurrent bids get a deterministic outcome without row locks.
+        Raises ValidationError on rejection.
+        """
+        listing = ProductListing.objects.with_stock().select_related('current_high_bid').get(pk=self.pk)
+        if not listing.is_active or not listing.is_bidding_open():
+            raise ValidationError('Bidding has closed for this product.')
+        if amount <= listing.price:
+            raise ValidationError(f'Bid must be greater than the base price of ₹{listing.price}.')
+        current = listing.current_high_bid
+        if current and amount <= current.amount:
+            raise ValidationError(f'Your bid must be higher than ₹{current.amount}.')
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Snapshot the available stock, including the quantity the outbid top bid was locking
+            quantity = listing.available_quantity + listing.locked_bid_quantity
+            bid = Bid.objects.create(listing=listing, bidder=bidder, amount=amount, quantity=quantity)
+            updated = ProductListing.objects.filter(
+                _bidding_open_q(now),
+                pk=self.pk,
+                is_active=True,
+                current_high_bid_id=listing.current_high_bid_id,
+            ).update(
+                current_high_bid=bid,
+                locked_qty=Least(Value(bid.quantity), F('quantity')),
+            )
+            if not updated:
+                # Someone else's bid won the race; raising rolls ours back
+                raise ValidationError('Another bid was placed at the same time. Please review the new highest bid.')
+
+        self._highest_bid = bid
+        return bid
+
+    def reserve(self, buyer, quantity):
+        """
+        Hold stock for a regular purchase with a single conditional UPDATE, so
+        concurrent buyers can never take more than is free. Returns the pending
+        Purchase; raises ValidationError when the stock is gone.
+        """
+        from buyer.models import Purchase
+        with transaction.atomic():
+            held = (
+                ProductListing.objects
+                .with_stock()
+                .filter(pk=self.pk, is_active=True, stock_available__gte=quantity)
+                .update(reserved_qty=F('reserved_qty') + quantity)
+            )
+            if not held:
+                raise ValidationError('Quantity exceeds available stock.')
+            return Purchase.objects.create(
+                buyer=buyer,
+                listing=self,
+                purchase_type='regular',
+                quantity=quantity,
+                unit_price=self.price,
+                total_price=self.price * quantity,
+                status='pending_payment',
+                reserved_until=timezone.now() + RESERVATION_HOLD,
+            )
+
+    def record_payment(self, purchase):
+        """Add a completed purchase to the sold and revenue counters, consuming its reservation"""
+        from analytics.events import record_sales_delta
+        sold_field = 'sold_bid_qty' if purchase.purchase_type == 'bid' else 'sold_regular_qty'
+        counters = {
+            sold_field: F(sold_field) + purchase.quantity,
+            'completed_revenue': F('completed_revenue') + purchase.total_price,
+        }
+        if purchase.reserved_until:
+            counters['reserved_qty'] = Greatest(F('reserved_qty') - purchase.quantity, Value(0))
+        ProductListing.objects.filter(pk=self.pk).update(**counters)
+
+        if purchase.purchase_type == 'bid':
+            sales = {'bid_qty': purchase.quantity, 'bid_revenue': purchase.total_price,
+                     'bid_base_value': purchase.quantity * self.price}
+        else:
+            sales = {'regular_qty': purchase.quantity, 'regular_revenue': purchase.total_price}
+        record_sales_delta(self.user_id, self.crop_type, self.location, **sales)
+
     def __str__(self):
         return self.name
 
@@ -199,10 +719,16 @@ class Bid(models.Model):
     is_accepted = models.BooleanField(default=False)
     payment_status = models.CharField(
         max_length=20,
-        choices=[('pending', 'Pending Payment'), ('completed', 'Payment Completed')],
+        choices=[('pending', 'Pending Payment'), ('completed', 'Payment Completed'), ('expired', 'Payment Window Expired')],
         default='pending'
     )
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['listing', '-amount', 'placed_at'], name='bid_listing_amount_idx'),
+            models.Index(fields=['is_accepted', 'payment_status', 'placed_at'], name='bid_paid_placed_idx'),
+        ]
+
     @property
     def total_amount(self):
         return self.amount * self.quantity
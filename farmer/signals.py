@@ -1,7 +1,7 @@
 from django.dispatch import receiver
 from django.conf import settings
 from django.db.models.signals import post_save, pre_save
-from django.core.mail import send_mail
+from notifications.outbox import queue_email
 from .models import CultivationBooking, StorageBooking
 
 
@@ -41,10 +41,9 @@ def handle_storage_approval(sender, instance, **kwargs):
 def send_booking_notification(sender, instance, created, **kwargs):
     """Notify user of new booking submission."""
     if created:
-        send_mail(
+        queue_email(
             'Booking Request Received',
             f'Your booking for {instance.slot.name} is pending admin approval.',
             settings.DEFAULT_FROM_EMAIL,
             [instance.user.email],
-            fail_silently=True,
         )
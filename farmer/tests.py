@@ -1,3 +1,190 @@
-from django.test import TestCase
+import random
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from buyer.models import Purchase
+from utils.testing import create_listing, create_user, mute_analytics, retry_locked
+from .models import Bid, ProductListing
+
+
+class ConcurrentBidTests(TransactionTestCase):
+    """Many threads bidding on one listing at once through ProductListing.place_bid"""
+
+    THREADS = 8
+    BIDS_PER_THREAD = 250
+
+    def setUp(self):
+        mute_analytics(self)
+        self.farmer = create_user('farmer', role='farmer')
+        self.bidders = [create_user(f'buyer{i}') for i in range(self.THREADS)]
+        self.listing = create_listing(self.farmer, bid_end_time=timezone.now() + timedelta(hours=1))
+
+    def test_concurrent_bids_keep_a_single_increasing_top_bid(self):
+        accepted, errors = [], []
+        lock = threading.Lock()
+
+        def bid_repeatedly(bidder):
+            rng = random.Random(bidder.pk)
+            try:
+                for round_number in range(self.BIDS_PER_THREAD):
+                    # Amounts climb each round so the threads keep competing near the top bid
+                    amount = Decimal('11') + round_number + Decimal(rng.randint(0, 99)) / 100
+                    try:
+                        retry_locked(lambda: ProductListing.objects.get(pk=self.listing.pk).place_bid(bidder, amount))
+                    except ValidationError:
+                        # Too low, or another bid won the race; the transaction rolled back
+                        continue
+                    with lock:
+                        accepted.append(amount)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=bid_repeatedly, args=(bidder,)) for bidder in self.bidders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        amounts = list(Bid.objects.filter(listing=self.listing).order_by('pk').values_list('amount', flat=True))
+        self.assertTrue(accepted)
+        self.assertEqual(len(amounts), len(accepted))
+        self.assertTrue(all(a < b for a, b in zip(amounts, amounts[1:])), 'accepted bids must strictly increase')
+
+        self.listing.refresh_from_db()
+        top = Bid.objects.filter(listing=self.listing).order_by('-amount', 'placed_at').first()
+        self.assertEqual(self.listing.current_high_bid_id, top.pk)
+        self.assertEqual(self.listing.locked_qty, top.quantity)
+
+
+class AuctionLifecycleTests(TestCase):
+    """close_expired_auctions and expire_unpaid_wins, as the worker commands run them"""
+
+    def setUp(self):
+        mute_analytics(self)
+        self.farmer = create_user('farmer', role='farmer')
+        self.winner = create_user('winner')
+        self.runner_up = create_user('runner_up')
+        self.listing = create_listing(self.farmer, quantity=10, bid_end_time=timezone.now() + timedelta(hours=1))
+
+    def end_bidding(self):
+        ProductListing.objects.filter(pk=self.listing.pk).update(bid_end_time=timezone.now() - timedelta(minutes=1))
+
+    def place_bids(self):
+        runner_up_bid = self.listing.place_bid(self.runner_up, Decimal('11'))
+        winning_bid = self.listing.place_bid(self.winner, Decimal('12'))
+        self.end_bidding()
+        return winning_bid, runner_up_bid
+
+    def lapse_payment_window(self):
+        due = timezone.now() - timedelta(minutes=1)
+        ProductListing.objects.filter(pk=self.listing.pk).update(payment_due_at=due)
+        return due
+
+    def test_close_accepts_the_top_bid_and_opens_its_purchase(self):
+        winning_bid, runner_up_bid = self.place_bids()
+
+        self.assertEqual(ProductListing.objects.close_expired_auctions(), [self.listing])
+
+        self.listing.refresh_from_db()
+        self.assertFalse(self.listing.is_active)
+        self.assertGreater(self.listing.payment_due_at, timezone.now())
+        self.assertEqual(self.listing.current_high_bid_id, winning_bid.pk)
+        self.assertEqual(self.listing.locked_qty, 10)
+        winning_bid.refresh_from_db()
+        runner_up_bid.refresh_from_db()
+        self.assertTrue(winning_bid.is_accepted)
+        self.assertFalse(runner_up_bid.is_accepted)
+        purchase = Purchase.objects.get(listing=self.listing)
+        self.assertEqual(
+            (purchase.buyer, purchase.related_bid, purchase.purchase_type, purchase.status, purchase.total_price),
+            (self.winner, winning_bid, 'bid', 'pending_payment', Decimal('120')),
+        )
+        # A second run finds nothing left to close
+        self.assertEqual(ProductListing.objects.close_expired_auctions(), [])
+
+    def test_auction_without_bids_stays_open_for_direct_purchase(self):
+        self.end_bidding()
+
+        self.assertEqual(ProductListing.objects.close_expired_auctions(), [])
+
+        self.listing.refresh_from_db()
+        self.assertTrue(self.listing.is_active)
+        self.assertIsNone(self.listing.payment_due_at)
+        self.assertFalse(Purchase.objects.exists())
+        self.assertEqual(ProductListing.objects.with_stock().get(pk=self.listing.pk).available_quantity, 10)
+
+    def test_lapsed_win_is_offered_to_the_runner_up(self):
+        winning_bid, runner_up_bid = self.place_bids()
+        ProductListing.objects.close_expired_auctions()
+        self.lapse_payment_window()
+
+        self.assertEqual(ProductListing.objects.expire_unpaid_wins(), [self.listing])
+
+        winning_bid.refresh_from_db()
+        self.assertEqual((winning_bid.payment_status, winning_bid.is_accepted), ('expired', False))
+        self.assertEqual(Purchase.objects.get(related_bid=winning_bid).status, 'cancelled')
+        self.listing.refresh_from_db()
+        self.assertTrue(self.listing.is_active)
+        self.assertIsNone(self.listing.payment_due_at)
+        self.assertEqual(self.listing.current_high_bid_id, runner_up_bid.pk)
+
+        self.assertEqual(ProductListing.objects.close_expired_auctions(), [self.listing])
+        runner_up_bid.refresh_from_db()
+        self.assertTrue(runner_up_bid.is_accepted)
+        purchase = Purchase.objects.get(related_bid=runner_up_bid)
+        self.assertEqual((purchase.buyer, purchase.status), (self.runner_up, 'pending_payment'))
+
+    def test_payment_after_the_deadline_is_refused(self):
+        self.place_bids()
+        ProductListing.objects.close_expired_auctions()
+        self.lapse_payment_window()
+        purchase = Purchase.objects.get(listing=self.listing)
+        self.client.force_login(self.winner)
+
+        response = self.client.post(reverse('buyer:pay', args=[purchase.pk]))
+
+        self.assertRedirects(response, reverse('buyer:product_detail', args=[self.listing.pk]), fetch_redirect_response=False)
+        purchase.refresh_from_db()
+        self.assertEqual(purchase.status, 'pending_payment')
+        self.assertEqual(len(ProductListing.objects.expire_unpaid_wins()), 1)
+
+    def test_payment_landing_while_the_sweeper_runs_keeps_the_sale(self):
+        winning_bid, _ = self.place_bids()
+        ProductListing.objects.close_expired_auctions()
+        paid_at = self.lapse_payment_window() - timedelta(seconds=1)
+        purchase = Purchase.objects.get(listing=self.listing)
+        self.client.force_login(self.winner)
+        responses = []
+
+        def pay_before_first_update(execute, sql, params, many, context):
+            # The sweeper has selected the lapsed win; a payment made just inside the window commits first
+            if not responses and sql.startswith('UPDATE'):
+                responses.append(None)  # the view's own UPDATEs pass straight through
+                with mock.patch('django.utils.timezone.now', return_value=paid_at):
+                    responses[0] = self.client.post(reverse('buyer:pay', args=[purchase.pk]))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(pay_before_first_update):
+            released = ProductListing.objects.expire_unpaid_wins()
+
+        self.assertRedirects(responses[0], reverse('buyer:success', args=[purchase.pk]), fetch_redirect_response=False)
+        self.assertEqual(released, [])
+        purchase.refresh_from_db()
+        winning_bid.refresh_from_db()
+        self.assertEqual(purchase.status, 'payment_completed')
+        self.assertEqual((winning_bid.payment_status, winning_bid.is_accepted), ('completed', True))
+        self.listing.refresh_from_db()
+        self.assertFalse(self.listing.is_active)
+        self.assertEqual(self.listing.sold_bid_qty, 10)
+        self.assertEqual(ProductListing.objects.with_stock().get(pk=self.listing.pk).available_quantity, 0)
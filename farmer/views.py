@@ -17,6 +17,8 @@ from django.utils import timezone
 from adminpanel.models import CultivationSlot, StorageSlot, SubsidyScheme
 from .models import CultivationBooking, StorageBooking, ProductListing, Bid
 from .forms import CultivationBookingForm, StorageBookingForm, ProductListingForm
+from analytics.models import SalesAggregate
+from notifications.broadcasts import deliver_broadcasts
 
 def farmer_required(view_func):
     def wrapper(request, *args, **kwargs):
@@ -29,6 +31,8 @@ def farmer_required(view_func):
 @login_required
 @farmer_required
 def dashboard(request):
+    # Pick up admin broadcasts here so the navbar badge includes them
+    deliver_broadcasts(request.user)
     context = {
         'pending_bookings': CultivationBooking.objects.filter(user=request.user, status='pending').count() + StorageBooking.objects.filter(user=request.user, status='pending').count(),
         'active_listings': ProductListing.objects.filter(user=request.user, is_active=True).count(),
@@ -65,7 +69,12 @@ from .models import ProductListing
 from .forms import ProductListingForm
 @login_required
 def marketplace_sell(request):
-    listings = ProductListing.objects.filter(user=request.user).order_by('-created_at')
+    listings = (
+        ProductListing.objects.with_stock().with_revenue()
+        .filter(user=request.user)
+        .select_related('current_high_bid__bidder')
+        .order_by('-created_at')
+    )
     now = timezone.now()
 
     # Active bidding: started, not ended or open-ended, active
@@ -81,19 +90,17 @@ def marketplace_sell(request):
     ongoingpageobj, ongoingbidding = paginate_queryset(request, ongoingbidding)
     pastpageobj, past = paginate_queryset(request, past)
 
-    # Calculate ONLY completed revenues: ensure these fields are correctly named in your model
-    totalbidrevenue = sum(l.bid_revenue for l in listings)
-    totalregularrevenue = sum(l.regular_sales_revenue for l in listings)
-    totalrevenue = totalbidrevenue + totalregularrevenue
+    # Completed revenue across all of the farmer's listings in one grouped query
+    revenue = ProductListing.objects.filter(user=request.user).revenue_totals()
 
     context = {
         'ongoinglistings': ongoingbidding,
         'ongoingpageobj': ongoingpageobj,
         'pastlistings': past,
         'pastpageobj': pastpageobj,
-        'totalbidrevenue': totalbidrevenue,
-        'totalregularrevenue': totalregularrevenue,
-        'totalrevenue': totalrevenue,
+        'totalbidrevenue': revenue['bid'],
+        'totalregularrevenue': revenue['regular'],
+        'totalrevenue': revenue['total'],
         'now': now,
     }
 
@@ -290,8 +297,12 @@ def subsidies(request):
 @login_required
 @farmer_required
 def analytics_guidance(request):
-    # Placeholder: AI predictions, weather
-    context = {'message': 'Analytics and guidance features coming soon. Weather alerts and crop predictions will be here.'}
+    # Precomputed per crop/location sales; one indexed query on (farmer, crop_type, location)
+    aggregates = SalesAggregate.objects.filter(farmer=request.user).exclude(listings=0, regular_qty=0, bid_qty=0)
+    context = {
+        'aggregates': aggregates,
+        'message': 'Weather alerts and crop predictions will be here.',
+    }
     return render(request, 'farmer/analytics_guidance.html', context)
 
 @login_required
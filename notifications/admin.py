@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import OutboundEmail
 
-# Register your models here.
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
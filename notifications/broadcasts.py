@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import BroadcastCursor, Notification, NotificationBroadcast
+from .unread import adjust_unread, forget_unread
+
+# Chunk size for fanning a notification out to an explicit recipient list
+FANOUT_BATCH_SIZE = 1000
+
+LATEST_BROADCAST_KEY = 'notifications:broadcast:latest'
+# The latest/seen ids are only a shortcut past the database; they expire this
+# often so a process whose local cache missed a new broadcast catches up
+BROADCAST_CACHE_TTL = getattr(settings, 'NOTIFICATIONS_BROADCAST_CACHE_TTL', 60)
+
+
+def fan_out(recipients, batch_size=FANOUT_BATCH_SIZE, **fields):
+    """Create one Notification per recipient with chunked bulk INSERTs. Returns the number created."""
+    created = 0
+    chunk = []
+    for user in recipients:
+        chunk.append(Notification(user=user, **fields))
+        if len(chunk) >= batch_size:
+            created += _create_chunk(chunk)
+            chunk = []
+    if chunk:
+        created += _create_chunk(chunk)
+    return created
+
+
+def _create_chunk(chunk):
+    return len(bulk_notify(chunk))
+
+
+def bulk_notify(notifications, batch_size=FANOUT_BATCH_SIZE):
+    """bulk_create prepared Notification rows and drop their users' cached unread counts on commit"""
+    # bulk_create skips post_save, so the unread counters are refreshed here
+    created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    user_ids = {notification.user_id for notification in created}
+    transaction.on_commit(lambda: forget_unread(user_ids))
+    return created
+
+
+def broadcast(audience, created_by=None, **fields):
+    """Send to a whole audience with a single INSERT; recipients pick it up via deliver_broadcasts()"""
+    item = NotificationBroadcast.objects.create(audience=audience, created_by=created_by, **fields)
+    transaction.on_commit(lambda: cache.set(LATEST_BROADCAST_KEY, item.pk, BROADCAST_CACHE_TTL))
+    return item
+
+
+def deliver_broadcasts(user):
+    """
+    Materialize any broadcasts this user has not seen yet as their own
+    Notification rows, so read state and deletion work as for any other
+    notification. Costs nothing once the cached cursor is up to date.
+    """
+    if not user.is_authenticated or user.role not in ('farmer', 'buyer'):
+        return 0
+    latest = cache.get(LATEST_BROADCAST_KEY)
+    seen_key = f'notifications:broadcast:seen:{user.pk}'
+    if latest is not None and cache.get(seen_key, 0) >= latest:
+        return 0
+
+    cursor, _ = BroadcastCursor.objects.get_or_create(user=user)
+    # Read newest first and cap pending at it: a broadcast committed in between
+    # is left for the next visit instead of being skipped by the cursor
+    newest = NotificationBroadcast.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    pending = list(
+        NotificationBroadcast.objects
+        .filter(
+            pk__gt=cursor.last_broadcast_id, pk__lte=newest,
+            audience__in=[user.role, 'all'], created_at__gte=user.date_joined,
+        )
+        .order_by('pk')
+    )
+    if not pending:
+        # Nothing to deliver: remember that without a write. The cursor may lag
+        # behind broadcasts for other audiences; rescanning those costs one indexed read
+        _remember_seen(seen_key, max(newest, cursor.last_broadcast_id), latest)
+        return 0
+
+    delivered = 0
+    with transaction.atomic():
+        # Advancing the cursor first means a concurrent request cannot deliver the same broadcasts
+        claimed = BroadcastCursor.objects.filter(
+            pk=cursor.pk, last_broadcast_id=cursor.last_broadcast_id,
+        ).update(last_broadcast_id=max(newest, cursor.last_broadcast_id))
+        if claimed:
+            delivered = len(Notification.objects.bulk_create([
+                Notification(
+                    user=user,
+                    title=item.title,
+                    message=item.message,
+                    notification_type=item.notification_type,
+                    broadcast=item,
+                    related_id=item.pk,
+                    related_model='NotificationBroadcast',
+                )
+                for item in pending
+            ]))
+    if claimed:
+        adjust_unread(user.pk, delivered)
+        _remember_seen(seen_key, max(newest, cursor.last_broadcast_id), latest)
+    return delivered
+
+
+def _remember_seen(seen_key, newest, latest):
+    cache.set(seen_key, newest, BROADCAST_CACHE_TTL)
+    if latest is None:
+        cache.set(LATEST_BROADCAST_KEY, newest, BROADCAST_CACHE_TTL)
@@ -0,0 +1,15 @@
+from .unread import unread_count
+
+
+def unread_notifications(request):
+    """
+    {{ unread_notifications_count }} for the navbar badge. Evaluated only
+    when a template uses it, and served from the cache on the hot path.
+    Broadcasts are delivered by the inbox and dashboard views, not here.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+
+    # Templates call it on first use, so pages without the badge never count
+    return {'unread_notifications_count': lambda: unread_count(user)}
@@ -2,10 +2,19 @@ from django import forms
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 from accounts.models import CustomUser  
-from .models import Notification
+from .models import Notification, NotificationBroadcast
+from .broadcasts import broadcast, fan_out
 
 class CustomNotificationForm(forms.ModelForm):
-    recipients = forms.ModelMultipleChoiceField(queryset=CustomUser.objects.filter(role__in=['farmer', 'buyer']))
+    audience = forms.ChoiceField(
+        choices=[('', 'Selected recipients only')] + NotificationBroadcast.AUDIENCE_CHOICES,
+        required=False,
+        help_text='Broadcasting to a whole audience is a single write, however many users it reaches.',
+    )
+    recipients = forms.ModelMultipleChoiceField(
+        queryset=CustomUser.objects.filter(role__in=['farmer', 'buyer']),
+        required=False,
+    )
 
     class Meta:
         model = Notification
@@ -17,12 +26,18 @@ class CustomNotificationForm(forms.ModelForm):
         self.helper = FormHelper()
         self.helper.add_input(Submit('submit', 'Send Notification', css_class='btn btn-primary'))
 
-    def save(self, commit=True):
-        instance = super().save(commit=False)
-        for recipient in self.cleaned_data['recipients']:
-            notif = instance
-            notif.pk = None  # New instance per user
-            notif.user = recipient
-            if commit:
-                notif.save()
-        return instance
\ No newline at end of file
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('audience') and not cleaned_data.get('recipients'):
+            raise forms.ValidationError('Choose an audience or at least one recipient.')
+        return cleaned_data
+
+    def save(self, commit=True, created_by=None):
+        """Broadcast to the chosen audience, or fan out to the selected recipients; returns the count queued"""
+        fields = {name: self.cleaned_data[name] for name in ('title', 'message', 'notification_type')}
+        if not commit:
+            return 0
+        if self.cleaned_data['audience']:
+            broadcast(self.cleaned_data['audience'], created_by=created_by, **fields)
+            return 1
+        return fan_out(self.cleaned_data['recipients'].iterator(), **fields)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from notifications.outbox import send_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails in batches over one mail connection, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll the outbox.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.send_all(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} email(s), {failed} failed.'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def send_all(self, batch_size):
+        sent = failed = 0
+        while True:
+            batch_sent, batch_failed = send_outbox(batch_size=batch_size)
+            sent += batch_sent
+            failed += batch_failed
+            if batch_sent + batch_failed < batch_size:
+                return sent, failed
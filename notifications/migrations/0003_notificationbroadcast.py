@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_remove_customuser_lat_remove_customuser_long_and_more'),
+        ('notifications', '0002_outboundemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastCursor',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='broadcast_cursor', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_broadcast_id', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NotificationBroadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('notification_type', models.CharField(choices=[('approval', 'Approval/Rejection'), ('booking', 'Booking Update'), ('marketplace', 'Marketplace Transaction'), ('scheme', 'New Scheme Alert'), ('weather', 'Weather Alert'), ('custom', 'Custom')], max_length=20)),
+                ('audience', models.CharField(choices=[('farmer', 'All farmers'), ('buyer', 'All buyers'), ('all', 'All farmers and buyers')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='broadcast',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deliveries', to='notifications.notificationbroadcast'),
+        ),
+    ]
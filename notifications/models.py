@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import CustomUser
 
 class Notification(models.Model):
@@ -18,9 +19,73 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     related_id = models.PositiveIntegerField(null=True, blank=True)  # e.g., booking ID
     related_model = models.CharField(max_length=50, null=True, blank=True)  # e.g., 'CultivationBooking'
+    broadcast = models.ForeignKey('NotificationBroadcast', on_delete=models.SET_NULL, null=True, blank=True, related_name='deliveries')
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+        ]
+
+class NotificationBroadcast(models.Model):
+    """
+    One row per admin broadcast to a whole audience. Each recipient's
+    Notification is created lazily on their next visit (see broadcasts.py).
+    """
+    AUDIENCE_CHOICES = [
+        ('farmer', 'All farmers'),
+        ('buyer', 'All buyers'),
+        ('all', 'All farmers and buyers'),
+    ]
+    title = models.CharField(max_length=100)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    audience = models.CharField(max_length=10, choices=AUDIENCE_CHOICES)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_audience_display()} - {self.title}"
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class BroadcastCursor(models.Model):
+    """Id of the newest broadcast already delivered to (or skipped for) user"""
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='broadcast_cursor')
+    last_broadcast_id = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} @ {self.last_broadcast_id}"
+
+
+class OutboundEmail(models.Model):
+    """Durable outbox row; written with the change that triggers it, sent by send_outbox_emails"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
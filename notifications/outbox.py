@@ -0,0 +1,109 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# A message is given up on after this many failed attempts
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+# Retry delay doubles per attempt from RETRY_BASE, capped at RETRY_MAX
+RETRY_BASE = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE', 60))
+RETRY_MAX = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX', 3600))
+# Claimed rows are hidden from other workers for this long while being sent
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def queue_email(subject, message, from_email, recipient_list):
+    """
+    Drop-in for send_mail(): store the message in the outbox instead of
+    talking to SMTP. Written in the caller's transaction, so a rolled-back
+    change never sends mail.
+    """
+    recipients = [address for address in recipient_list if address]
+    if not recipients:
+        return None
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+
+
+def queue_mass_email(datatuple):
+    """Drop-in for send_mass_mail(): one outbox row per (subject, message, from_email, recipients)"""
+    rows = [
+        OutboundEmail(
+            subject=subject,
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=[address for address in recipients if address],
+        )
+        for subject, message, from_email, recipients in datatuple
+        if any(recipients)
+    ]
+    return OutboundEmail.objects.bulk_create(rows)
+
+
+def send_outbox(batch_size=100):
+    """
+    Send one batch of due outbox messages over a single mail connection.
+    Failures are retried with exponential backoff until MAX_ATTEMPTS.
+    Returns (sent, failed) counts for the batch.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects
+            .filter(status='pending', next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(next_attempt_at=now + CLAIM_LEASE)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Mail server unreachable: the whole batch is retried later
+        logger.warning('Outbox could not connect to the mail server: %s', exc)
+        for email in batch:
+            _mark_failed(email, exc)
+        OutboundEmail.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at', 'last_error'])
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(email.subject, email.body, email.from_email, email.recipients, connection=connection)
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                _mark_failed(email, exc)
+                failed += 1
+            else:
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+    finally:
+        connection.close()
+        OutboundEmail.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, failed
+
+
+def _mark_failed(email, exc):
+    email.attempts += 1
+    email.last_error = f'{type(exc).__name__}: {exc}'
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+        logger.error('Giving up on outbox email %s after %d attempts: %s', email.pk, email.attempts, exc)
+    else:
+        email.next_attempt_at = timezone.now() + min(RETRY_BASE * 2 ** (email.attempts - 1), RETRY_MAX)
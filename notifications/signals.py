@@ -1,27 +1,49 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.conf import settings
 from .models import Notification
+from .outbox import queue_email
+from .unread import adjust_unread
 from accounts.models import CustomUser
 from adminpanel.models import UserDocument
 from farmer.models import CultivationBooking, StorageBooking, Bid, ProductListing
 
+APPROVAL_MESSAGES = {
+    True: 'Your AgriLeader account has been approved.',
+    False: 'Your AgriLeader account has been rejected. Please contact support.',
+}
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_approval_state(sender, instance, update_fields=None, **kwargs):
+    """Snapshot the stored is_approved so post_save only reacts to a real transition"""
+    instance._previous_is_approved = None
+    if not instance.pk or (update_fields is not None and 'is_approved' not in update_fields):
+        return  # New user, or a partial save such as the last_login update on login
+    instance._previous_is_approved = (
+        CustomUser.objects.filter(pk=instance.pk).values_list('is_approved', flat=True).first()
+    )
+
+
 @receiver(post_save, sender=CustomUser)
 def user_approval_notification(sender, instance, created, **kwargs):
-    if created:
-        return  # Ignore creation
+    """The one place an approval change notifies the user: one Notification, one email"""
+    previous = getattr(instance, '_previous_is_approved', None)
+    if created or previous is None or previous == instance.is_approved:
+        return
 
-    # Fetch previous value from DB
-    old_instance = CustomUser.objects.filter(pk=instance.pk).first()
-    if old_instance and old_instance.is_approved != instance.is_approved:
-        status = 'Approved' if instance.is_approved else 'Rejected'
-        Notification.objects.create(
-            user=instance,
-            title=f'Account {status}',
-            message=f'Your AgriLeader account has been {status.lower()}.',
-            notification_type='approval'
-        )
+    status = 'Approved' if instance.is_approved else 'Rejected'
+    message = APPROVAL_MESSAGES[instance.is_approved]
+    Notification.objects.create(
+        user=instance,
+        title=f'Account {status}',
+        message=message,
+        notification_type='approval'
+    )
+    queue_email(f'Account {status}', message, settings.DEFAULT_FROM_EMAIL, [instance.email])
+    # A second save() of the same instance is not another transition
+    instance._previous_is_approved = instance.is_approved
 
 
 @receiver(post_save, sender=UserDocument)
@@ -88,4 +110,10 @@ def bid_notification(sender, instance, created, **kwargs):
 def listing_approval_notification(sender, instance, created, **kwargs):
     if created:
         # Placeholder: Admin approval for listings (add status if needed)
-        pass
\ No newline at end of file
+        pass
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: adjust_unread(instance.user_id, 1))
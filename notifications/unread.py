@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+from .models import Notification
+
+# Cached counts are recounted from the database at least this often, which
+# bounds any drift from missed adjustments. Adjustments only reach other
+# processes through a shared cache backend (see CACHES in settings).
+UNREAD_CACHE_TTL = getattr(settings, 'NOTIFICATIONS_UNREAD_CACHE_TTL', 600)
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user):
+    """Unread notifications for user, from the cache when possible"""
+    if not user.is_authenticated:
+        return 0
+    count = cache.get(_key(user.pk))
+    if count is None:
+        count = Notification.objects.filter(user=user, is_read=False).count()
+        cache.set(_key(user.pk), count, UNREAD_CACHE_TTL)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    """Shift a cached count; an uncached count is simply recounted on next read"""
+    if not delta:
+        return
+    try:
+        if cache.incr(_key(user_id), delta) < 0:
+            cache.delete(_key(user_id))
+    except ValueError:
+        pass
+
+
+def forget_unread(user_ids):
+    """Drop cached counts so they are recounted, e.g. after a bulk insert"""
+    cache.delete_many([_key(user_id) for user_id in user_ids])
@@ -10,5 +10,7 @@ urlpatterns = [
     path('farmer/', views.farmer_notifications, name='farmer_notifications'),
     path('buyer/', views.buyer_notifications, name='buyer_notifications'),
     path('mark-read/<int:notif_id>/', views.mark_read, name='mark_read'),
+    path('mark-all-read/', views.mark_all_read, name='mark_all_read'),
+    path('delete-read/', views.delete_read, name='delete_read'),
     # path('weather/', views.generate_weather_alert, name='generate_weather'),  # Call via cron
 ]
\ No newline at end of file
@@ -3,8 +3,12 @@ from django.contrib.auth.decorators import login_required
 from utils.pagination import paginate_queryset  # make sure path is correct
 from django.contrib import messages
 from django.utils import timezone
-from django.core.paginator import Paginator
-from .models import Notification
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_POST
+from datetime import timedelta
+from .models import Notification, NotificationBroadcast
+from .broadcasts import deliver_broadcasts
+from .unread import adjust_unread, unread_count
 from .forms import CustomNotificationForm
 from accounts.models import CustomUser
 
@@ -27,17 +31,17 @@ def user_required(view_func):
 
 @login_required
 def dashboard(request):
-    notifications = Notification.objects.filter(user=request.user, is_read=False).count()
-    return render(request, 'notifications/dashboard.html', {'unread_count': notifications})
+    deliver_broadcasts(request.user)
+    return render(request, 'notifications/dashboard.html', {'unread_count': unread_count(request.user)})
 
 @login_required
 @admin_required
 def admin_notifications(request):
     # Get all notifications
-    all_notifications = Notification.objects.all().order_by('-created_at')
+    all_notifications = Notification.objects.select_related('user').order_by('-created_at', 'id')
 
-    # Use global pagination utility
-    page_obj, notifications = paginate_queryset(request, all_notifications)
+    # Keyset pagination: this table grows without bound
+    page_obj, notifications = paginate_queryset(request, all_notifications, mode='keyset')
 
     return render(request, 'notifications/admin_notifications.html', {
         'notifications': notifications,  # paginated list for the table
@@ -49,29 +53,92 @@ def admin_notifications(request):
 @user_required
 def farmer_notifications(request):
     # Farmer-specific, e.g., filter by type
-    notifs = Notification.objects.filter(user=request.user).order_by('-created_at')
-    page_obj, notifs = paginate_queryset(request, notifs)
-    return render(request, 'notifications/farmer_notifications.html', {'notifications': notifs , 'page_obj': page_obj})
+    deliver_broadcasts(request.user)
+    notifs = Notification.objects.filter(user=request.user).order_by('-created_at', 'id')
+    page_obj, notifs = paginate_queryset(request, notifs, mode='keyset')
+    return render(request, 'notifications/farmer_notifications.html', {
+        'notifications': notifs,
+        'page_obj': page_obj,
+        'notification_types': Notification.NOTIFICATION_TYPES,
+    })
 
 @login_required
 @user_required
 def buyer_notifications(request):
     # Similar to farmer
-    notifs = Notification.objects.filter(user=request.user).order_by('-created_at')
-    paginator = Paginator(notifs, 10)
-    page_number = request.GET.get('page')
-    notifs_paginated = paginator.get_page(page_number)
-    return render(request, 'notifications/buyer_notifications.html', {'notifications': notifs_paginated})
+    deliver_broadcasts(request.user)
+    notifs = Notification.objects.filter(user=request.user).order_by('-created_at', 'id')
+    page_obj, notifs = paginate_queryset(request, notifs, mode='keyset')
+    return render(request, 'notifications/buyer_notifications.html', {
+        'notifications': notifs,
+        'page_obj': page_obj,
+        'notification_types': Notification.NOTIFICATION_TYPES,
+    })
 
 @login_required
 def mark_read(request, notif_id):
     notif = get_object_or_404(Notification, id=notif_id, user=request.user)
-    notif.is_read = True
-    notif.save()
+    # Conditional update so the unread counter only moves on a real unread -> read change
+    if Notification.objects.filter(pk=notif.pk, is_read=False).update(is_read=True):
+        adjust_unread(request.user.pk, -1)
     messages.success(request, 'Notification marked as read.')
+    return _redirect_to_inbox(request.user)
+
+
+@login_required
+@require_POST
+def mark_all_read(request):
+    """Mark unread notifications as read, optionally only one type or only those before a time"""
+    notifs = Notification.objects.filter(user=request.user, is_read=False)
+
+    notification_type = request.POST.get('type')
+    if notification_type:
+        if notification_type not in dict(Notification.NOTIFICATION_TYPES):
+            messages.error(request, 'Unknown notification type.')
+            return _redirect_to_inbox(request.user)
+        notifs = notifs.filter(notification_type=notification_type)
+
+    before = request.POST.get('before')
+    if before:
+        before_dt = parse_datetime(before)
+        if before_dt is None:
+            messages.error(request, 'Invalid date for "before".')
+            return _redirect_to_inbox(request.user)
+        if timezone.is_naive(before_dt):
+            before_dt = timezone.make_aware(before_dt)
+        notifs = notifs.filter(created_at__lt=before_dt)
+
+    # One UPDATE on the (user, is_read, created_at) index
+    count = notifs.update(is_read=True)
+    adjust_unread(request.user.pk, -count)
+    messages.success(request, f'{count} notification(s) marked as read.')
+    return _redirect_to_inbox(request.user)
+
+
+@login_required
+@require_POST
+def delete_read(request):
+    """Delete read notifications older than older_than_days (default 30)"""
+    try:
+        days = int(request.POST.get('older_than_days', 30))
+    except ValueError:
+        days = -1
+    if days < 0:
+        messages.error(request, 'Days must be a whole number, zero or more.')
+        return _redirect_to_inbox(request.user)
+
+    notifs = Notification.objects.filter(
+        user=request.user, is_read=True, created_at__lt=timezone.now() - timedelta(days=days),
+    )
+    # Read rows are not in the unread count and nothing listens for their deletion,
+    # so Django can fast-delete them with a single DELETE
+    count, _ = notifs.delete()
+    messages.success(request, f'{count} read notification(s) deleted.')
+    return _redirect_to_inbox(request.user)
+
 
+def _redirect_to_inbox(user):
     # Redirect based on user role
-    user = request.user
     if hasattr(user, 'role'):  # assuming you have a 'role' field on the user model
         if user.role == 'farmer':
             return redirect('notifications:farmer_notifications')
@@ -90,8 +157,12 @@ def send_notification(request):
     if request.method == 'POST':
         form = CustomNotificationForm(request.POST)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Notification sent.')
+            form.save(created_by=request.user)
+            audience = form.cleaned_data['audience']
+            if audience:
+                messages.success(request, f'Notification broadcast to {dict(NotificationBroadcast.AUDIENCE_CHOICES)[audience].lower()}.')
+            else:
+                messages.success(request, 'Notification sent.')
             return redirect('notifications:admin_notifications')
     else:
         form = CustomNotificationForm()
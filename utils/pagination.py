@@ -1,14 +1,47 @@
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.utils.functional import cached_property
 
 # You can also import from Django settings for configurability
 DEFAULT_PER_PAGE = 7
 
-def paginate_queryset(request, queryset):
+CURSOR_PARAM = 'cursor'
+CURSOR_SALT = 'utils.pagination.cursor'
+
+# Page counts are cached per queryset for this many seconds, and this TTL is
+# the only hard bound on staleness. A save() or delete() in a process that has
+# counted the table drops them sooner, but QuerySet.update(), bulk_create() and
+# writes from other processes (e.g. the management command workers) are only
+# picked up once the TTL runs out.
+COUNT_CACHE_TTL = getattr(settings, 'PAGINATION_COUNT_CACHE_TTL', 30)
+# count='estimate' trusts the planner's row estimate above this size
+ESTIMATE_THRESHOLD = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', 100_000)
+
+
+def paginate_queryset(request, queryset, mode='page', count='cached'):
     """
     Generic pagination function with a globally set items per page.
     Change DEFAULT_PER_PAGE here to update pagination everywhere.
+
+    mode='keyset' switches to cursor pagination for tables that grow without
+    bound: no COUNT(*) and no OFFSET, so deep pages cost the same as the first.
+    count='estimate' lets very large unfiltered tables use the database's row
+    estimate instead of an exact COUNT(*).
     """
-    paginator = Paginator(queryset, DEFAULT_PER_PAGE)
+    if mode == 'keyset':
+        return paginate_keyset(request, queryset)
+
+    paginator = CountingPaginator(queryset, DEFAULT_PER_PAGE, count_mode=count)
     page_number = request.GET.get('page')
 
     try:
@@ -18,4 +51,223 @@ def paginate_queryset(request, queryset):
     except EmptyPage:
         page_obj = paginator.page(paginator.num_pages)
 
-    return page_obj, page_obj.object_list
\ No newline at end of file
+    return page_obj, page_obj.object_list
+
+
+class CountingPaginator(Paginator):
+    """Paginator whose COUNT(*) is cached per queryset fingerprint, or estimated"""
+
+    def __init__(self, object_list, per_page, count_mode='cached', **kwargs):
+        self.count_mode = count_mode
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        if self.count_mode == 'estimate':
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return cached_count(self.object_list)
+
+
+def cached_count(queryset):
+    """Exact count of queryset, cached until its tables change or the TTL runs out"""
+    tables = _queried_tables(queryset)
+    _watch_tables(tables)
+    version_keys = [_version_key(table) for table in tables]
+    versions = cache.get_many(version_keys)
+    sql, params = queryset.query.sql_with_params()
+    fingerprint = hashlib.md5(
+        repr((queryset.db, sql, _bucket_times(params), [versions.get(key, 0) for key in version_keys])).encode()
+    ).hexdigest()
+
+    key = f'pagination:count:{fingerprint}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TTL)
+    return count
+
+
+def _bucket_times(params):
+    """
+    Round datetime params down to COUNT_CACHE_TTL buckets. Querysets filtered
+    on timezone.now() (open_for_bidding, the farmer's ongoing/past split)
+    otherwise get a new key on every request and never hit the cache.
+    """
+    bucket = max(COUNT_CACHE_TTL, 1)
+    return tuple(
+        ('time', int(param.timestamp()) // bucket) if isinstance(param, datetime) else param
+        for param in params
+    )
+
+
+def estimated_count(queryset):
+    """Planner row estimate for an unfiltered queryset, or None where unsupported"""
+    query = queryset.query
+    if query.where or query.distinct or query.low_mark or query.high_mark is not None:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been analyzed
+    return row[0] if row and row[0] >= 0 else None
+
+
+def _queried_tables(queryset):
+    tables = {queryset.model._meta.db_table}
+    tables.update(join.table_name for join in queryset.query.alias_map.values())
+    return sorted(tables)
+
+
+def _version_key(table):
+    return f'pagination:version:{table}'
+
+
+def _invalidate_counts(sender, **kwargs):
+    key = _version_key(sender._meta.db_table)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+_watched_tables = set()
+
+
+def _watch_tables(tables):
+    """
+    Connect the version bump for the models behind tables the first time they
+    are counted. The receivers are sender-specific on purpose: a post_delete
+    receiver without a sender turns off Django's fast delete for every model.
+    """
+    models = _models_by_table()
+    for table in tables:
+        if table in _watched_tables or table not in models:
+            continue
+        model = models[table]
+        post_save.connect(_invalidate_counts, sender=model, dispatch_uid=f'pagination_counts_save:{table}')
+        post_delete.connect(_invalidate_counts, sender=model, dispatch_uid=f'pagination_counts_delete:{table}')
+        _watched_tables.add(table)
+
+
+@lru_cache(maxsize=None)
+def _models_by_table():
+    return {model._meta.db_table: model for model in apps.get_models()}
+
+
+class KeysetPage:
+    """Page of a keyset-paginated queryset, with opaque cursors for its neighbours"""
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate_keyset(request, queryset, per_page=DEFAULT_PER_PAGE):
+    """
+    Cursor pagination keyed on the queryset's order_by columns, e.g.
+    order_by('-created_at', 'id'). The primary key is appended as a tiebreaker
+    if it is missing. Ordering columns must be non-nullable model fields.
+    """
+    ordering = _keyset_ordering(queryset)
+    cursor = _load_cursor(request.GET.get(CURSOR_PARAM))
+    backwards = bool(cursor and cursor['dir'] == 'prev')
+
+    qs = queryset
+    if backwards:
+        qs = qs.order_by(*[_flip(field) for field in ordering])
+    if cursor:
+        qs = qs.filter(_after(queryset.model, ordering, cursor['key'], backwards))
+
+    rows = list(qs[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        # Whichever way we walked, the page we came from lies on the other side
+        more_after = has_more or backwards
+        more_before = has_more if backwards else cursor is not None
+        if more_after:
+            next_cursor = _dump_cursor(rows[-1], ordering, 'next')
+        if more_before:
+            previous_cursor = _dump_cursor(rows[0], ordering, 'prev')
+    page_obj = KeysetPage(rows, next_cursor, previous_cursor)
+    return page_obj, page_obj.object_list
+
+
+def _keyset_ordering(queryset):
+    ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+    pk_names = {'pk', queryset.model._meta.pk.name}
+    if not any(field.lstrip('-') in pk_names for field in ordering):
+        ordering.append('pk')
+    return ordering
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _after(model, ordering, key, backwards):
+    """Rows strictly after the cursor key in ordering, or before it when backwards"""
+    condition = Q()
+    equal_so_far = Q()
+    for field, value in zip(ordering, key):
+        name = field.lstrip('-')
+        descending = field.startswith('-') != backwards
+        value = _field(model, name).to_python(value)
+        condition |= equal_so_far & Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+        equal_so_far &= Q(**{name: value})
+    return condition
+
+
+def _field(model, name):
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def _dump_cursor(obj, ordering, direction):
+    key = []
+    for field in ordering:
+        value = getattr(obj, _field(type(obj), field.lstrip('-')).attname)
+        key.append(value if isinstance(value, (int, str)) else str(value))
+    return signing.dumps({'key': key, 'dir': direction}, salt=CURSOR_SALT, compress=True)
+
+
+def _load_cursor(token):
+    if not token:
+        return None
+    try:
+        return signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
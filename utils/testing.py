@@ -0,0 +1,48 @@
+import random
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.db import OperationalError
+
+from accounts.models import CustomUser
+from analytics.events import event_queue
+from farmer.models import ProductListing
+
+
+def retry_locked(attempt, tries=500):
+    """
+    Run attempt, retrying while the database reports a lock. The in-memory
+    SQLite test database fails contended writes at once instead of waiting,
+    so threaded tests wrap each transaction in this.
+    """
+    for _ in range(tries - 1):
+        try:
+            return attempt()
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            time.sleep(0.005 * random.random())
+    return attempt()
+
+
+def mute_analytics(testcase):
+    """Keep the analytics worker thread off the test database until testcase is cleaned up"""
+    patcher = mock.patch.object(event_queue, 'put')
+    patcher.start()
+    testcase.addCleanup(patcher.stop)
+
+
+def create_user(username, role='buyer'):
+    """A farmer or buyer with the profile fields the signup form requires"""
+    return CustomUser.objects.create_user(
+        username, f'{username}@example.com', 'pw', role=role, mobile='9999999999', address='a',
+    )
+
+
+def create_listing(farmer, **fields):
+    """A rice listing owned by farmer; fields override the defaults"""
+    defaults = dict(
+        name='Rice', description='d', quantity=100, price=Decimal('10'), crop_type='rice', location='Kochi',
+    )
+    return ProductListing.objects.create(user=farmer, **{**defaults, **fields})